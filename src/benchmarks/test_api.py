@@ -0,0 +1,34 @@
+import pytest
+
+import rangekeeper as rk
+
+from tests.test_api import _base, _entitybase
+
+
+def _bases(depth: int, breadth: int):
+    """
+    Returns a Speckle Base of an arborescent Assembly, with its Entities as elements
+    """
+    parents = [_entitybase("root", gfa=0.0)]
+    elements = list(parents)
+    relationships = []
+    for level in range(depth):
+        children = []
+        for parent in parents:
+            for i in range(breadth):
+                child = _entitybase("{0}.{1}".format(parent["entityId"], i), gfa=1.0)
+                relationships.append(
+                    _base(source=parent, target=child, type="contains")
+                )
+                children.append(child)
+        elements.extend(children)
+        parents = children
+    return _entitybase(
+        "tree", assembly=True, relationships=relationships, elements=elements
+    )
+
+
+@pytest.mark.parametrize("depth", [2, 3, 4])
+def test_parse(benchmark, depth):
+    base = _bases(depth=depth, breadth=10)
+    benchmark.pedantic(rk.api.Speckle.parse, kwargs={"base": base}, rounds=3)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import rangekeeper as rk
+
+PERIODS = [25, 100, 200]
+
+
+def _components(periods: int) -> dict:
+    frequency = rk.duration.Type.YEAR
+    sequence = rk.duration.Span.from_duration(
+        name="Span",
+        date=pd.Timestamp(2000, 1, 1),
+        duration=frequency,
+        amount=periods,
+    ).to_sequence(frequency=frequency)
+    trend = rk.dynamics.trend.Trend(
+        sequence=sequence,
+        cap_rate=0.05,
+        initial_value=0.050747414,
+        growth_rate=-0.002537905,
+    )
+    return {
+        "sequence": sequence,
+        "trend": trend,
+        "volatility": rk.dynamics.volatility.Volatility(
+            sequence=sequence,
+            trend=trend,
+            volatility_per_period=0.1,
+            autoregression_param=0.2,
+            mean_reversion_param=0.3,
+        ),
+        "cyclicality": rk.dynamics.cyclicality.Cyclicality.from_params(
+            sequence=sequence,
+            space_cycle_period=15.1,
+            space_cycle_phase=14.3,
+            space_cycle_amplitude=0.5,
+            asset_cycle_period=16.1,
+            asset_cycle_phase=15.6,
+            asset_cycle_amplitude=0.02,
+            space_cycle_asymmetric_parameter=0.7,
+            asset_cycle_asymmetric_parameter=0.7,
+        ),
+        "noise": rk.dynamics.noise.Noise(
+            sequence=sequence,
+            noise_dist=rk.distribution.Symmetric(
+                type=rk.distribution.Type.TRIANGULAR, mean=0.0, residual=0.05
+            ),
+        ),
+        "black_swan": rk.dynamics.black_swan.BlackSwan(
+            sequence=sequence,
+            likelihood=0.05,
+            dissipation_rate=0.3,
+            probability=rk.distribution.Uniform(),
+            impact=-0.25,
+        ),
+    }
+
+
+class TestMarket:
+    @pytest.mark.parametrize("periods", PERIODS)
+    def test_volatility(self, benchmark, periods):
+        components = _components(periods)
+        benchmark(
+            rk.dynamics.volatility.Volatility,
+            sequence=components["sequence"],
+            trend=components["trend"],
+            volatility_per_period=0.1,
+            autoregression_param=0.2,
+            mean_reversion_param=0.3,
+        )
+
+    @pytest.mark.parametrize("periods", PERIODS)
+    def test_market(self, benchmark, periods):
+        benchmark(rk.dynamics.market.Market, **_components(periods))
+
+
+class TestDistribution:
+    @pytest.mark.parametrize("size", [10**3, 10**5])
+    @pytest.mark.parametrize(
+        "sampling",
+        [rk.distribution.Sampling.RANDOM, rk.distribution.Sampling.SOBOL],
+        ids=["random", "sobol"],
+    )
+    def test_pert(self, benchmark, size, sampling):
+        form = rk.distribution.PERT(peak=0.5, weighting=4)
+        benchmark(form.sample, size=size, sampling=sampling)
+
+    @pytest.mark.parametrize("size", [10**3, 10**6])
+    @pytest.mark.parametrize("method", ["table", "rvs"])
+    def test_pert_table(self, benchmark, size, method):
+        # Table-driven sampling, against the distribution's own (scipy) sampling:
+        form = rk.distribution.PERT(peak=0.5, weighting=4)
+        generator = np.random.default_rng(0)
+        benchmark.group = "pert-{0}".format(size)
+        if method == "table":
+            benchmark(form.tabulate().sample, size=size, generator=generator)
+        else:
+            benchmark(form.dist.rvs, size=size, random_state=generator)
+
+
+class TestPolicy:
+    @pytest.mark.parametrize("scenarios", [100, 10**4])
+    def test_first_exercise(self, benchmark, scenarios):
+        states = np.random.default_rng(0).lognormal(sigma=0.2, size=(scenarios, 25))
+        benchmark(
+            rk.policy.first_exercise,
+            states=states,
+            condition=lambda states: states > 1.2,
+            earliest=2,
+        )
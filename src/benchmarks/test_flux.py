@@ -0,0 +1,71 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import rangekeeper as rk
+
+# Benchmarks (requires pytest-benchmark).
+# Run via a 'python -m pytest benchmarks' command from the root directory of this project;
+# see pytest-benchmark's --benchmark-autosave and --benchmark-compare options to track
+# results over time.
+
+PERIODS = [12, 120, 1200]
+
+
+def _sequence(periods: int):
+    return rk.duration.Sequence.from_bounds(
+        include_start=datetime.date(2020, 1, 1),
+        frequency=rk.duration.Type.MONTH,
+        bound=periods,
+    )
+
+
+def _flow(periods: int, name: str = "Flow") -> rk.flux.Flow:
+    data = np.random.default_rng(0).uniform(low=1, high=2, size=periods)
+    data[0] = -periods
+    return rk.flux.Flow.from_sequence(sequence=_sequence(periods), data=data, name=name)
+
+
+class TestFlow:
+    @pytest.mark.parametrize("periods", PERIODS)
+    def test_construction(self, benchmark, periods):
+        sequence = _sequence(periods)
+        data = np.random.default_rng(0).normal(size=periods)
+        benchmark(rk.flux.Flow.from_sequence, sequence=sequence, data=data)
+
+    @pytest.mark.parametrize("periods", PERIODS)
+    def test_resample(self, benchmark, periods):
+        flow = _flow(periods)
+        benchmark(flow.resample, frequency=rk.duration.Type.YEAR)
+
+    @pytest.mark.parametrize("periods", PERIODS)
+    def test_pv(self, benchmark, periods):
+        flow = _flow(periods)
+        benchmark(flow.pv, frequency=rk.duration.Type.MONTH, rate=0.005)
+
+    @pytest.mark.parametrize("periods", PERIODS)
+    def test_irr(self, benchmark, periods):
+        flow = _flow(periods)
+        benchmark(flow.irr)
+
+
+class TestStream:
+    @pytest.mark.parametrize("count", [10, 100, 1000])
+    def test_construction(self, benchmark, count):
+        flows = [_flow(120, name="Flow {0}".format(i)) for i in range(count)]
+        benchmark(
+            rk.flux.Stream,
+            name="Stream",
+            flows=flows,
+            frequency=rk.duration.Type.MONTH,
+        )
+
+    @pytest.mark.parametrize("count", [10, 100, 1000])
+    def test_sum(self, benchmark, count):
+        stream = rk.flux.Stream(
+            name="Stream",
+            flows=[_flow(120, name="Flow {0}".format(i)) for i in range(count)],
+            frequency=rk.duration.Type.MONTH,
+        )
+        benchmark(stream.sum)
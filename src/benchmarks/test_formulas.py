@@ -0,0 +1,29 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import rangekeeper as rk
+
+PERIODS = [12, 120, 1200]
+
+
+@pytest.mark.parametrize("periods", PERIODS)
+@pytest.mark.parametrize("type", list(rk.formula.financial.Account.Type))
+def test_account(benchmark, periods, type):
+    transactions = rk.flux.Flow.from_sequence(
+        sequence=rk.duration.Sequence.from_bounds(
+            include_start=datetime.date(2020, 1, 1),
+            frequency=rk.duration.Type.MONTH,
+            bound=periods,
+        ),
+        data=np.random.default_rng(0).normal(loc=10, scale=100, size=periods),
+        name="Transactions",
+    )
+    benchmark(
+        rk.formula.financial.Account,
+        transactions=transactions,
+        frequency=rk.duration.Type.MONTH,
+        rate=0.005,
+        type=type,
+    )
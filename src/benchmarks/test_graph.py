@@ -0,0 +1,54 @@
+import itertools
+
+import pytest
+
+import rangekeeper as rk
+
+from tests.test_graph import _tree
+
+DEPTHS = [2, 3, 4, pytest.param(5, marks=pytest.mark.slow)]  # 10² to 10⁵ leaves
+
+
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_tree(benchmark, depth):
+    benchmark.pedantic(_tree, kwargs={"depth": depth, "breadth": 10}, rounds=3)
+
+
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_aggregate(benchmark, depth):
+    assembly = _tree(depth=depth, breadth=10)
+    labels = ("subtotal_gfa_{0}".format(i) for i in itertools.count())
+
+    # Aggregations are cached per label, so each round aggregates afresh:
+    def aggregate():
+        assembly.aggregate(property="gfa", label=next(labels))
+
+    benchmark.pedantic(aggregate, rounds=5)
+
+
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_reaggregate(benchmark, depth):
+    assembly = _tree(depth=depth, breadth=10)
+    assembly.aggregate(property="gfa", label="subtotal_gfa")
+    leaf = assembly.get_leaves()["contains"][0]
+
+    # Only the changed leaf and its ancestors are re-aggregated:
+    def reaggregate():
+        leaf["gfa"] += 1.0
+        assembly.aggregate(property="gfa", label="subtotal_gfa")
+
+    benchmark(reaggregate)
+
+
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_iter_subentities(benchmark, depth):
+    assembly = _tree(depth=depth, breadth=10)
+    benchmark(lambda: sum(1 for _ in assembly.iter_subentities()))
+
+
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_snapshot(benchmark, depth, tmp_path):
+    assembly = _tree(depth=depth, breadth=10)
+    assembly.aggregate(property="gfa", label="subtotal_gfa")
+    rk.snapshot.save(assembly, tmp_path)
+    benchmark.pedantic(rk.snapshot.load, args=(tmp_path,), rounds=3)
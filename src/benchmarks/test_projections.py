@@ -0,0 +1,49 @@
+import datetime
+
+import pytest
+
+import rangekeeper as rk
+
+PERIODS = [12, 120, 1200]
+
+
+class TestSequence:
+    @pytest.mark.parametrize("periods", PERIODS)
+    def test_from_bounds(self, benchmark, periods):
+        benchmark(
+            rk.duration.Sequence.from_bounds,
+            include_start=datetime.date(2020, 1, 1),
+            frequency=rk.duration.Type.MONTH,
+            bound=periods,
+        )
+
+    @pytest.mark.parametrize("years", [1, 10, 100])
+    def test_from_bounds_dates(self, benchmark, years):
+        benchmark(
+            rk.duration.Sequence.from_bounds,
+            include_start=datetime.date(2020, 1, 1),
+            frequency=rk.duration.Type.MONTH,
+            bound=datetime.date(2020 + years, 1, 1),
+        )
+
+
+class TestExtrapolation:
+    @pytest.mark.parametrize("periods", PERIODS)
+    @pytest.mark.parametrize(
+        "form",
+        [
+            rk.extrapolation.Compounding(rate=0.02),
+            rk.extrapolation.Recurring(),
+        ],
+        ids=["compounding", "recurring"],
+    )
+    def test_terms(self, benchmark, periods, form):
+        projection = rk.projection.Extrapolation(
+            form=form,
+            sequence=rk.duration.Sequence.from_bounds(
+                include_start=datetime.date(2020, 1, 1),
+                frequency=rk.duration.Type.MONTH,
+                bound=periods,
+            ),
+        )
+        benchmark(projection.terms)
@@ -1,4 +1,4 @@
-from . import api as api
+from . import profiling as profiling
 from . import measure as measure
 from . import distribution as distribution
 from . import duration as duration
@@ -8,6 +8,8 @@ from . import graph as graph
 from . import policy as policy
 from . import projection as projection
 from . import segmentation as segmentation
+from . import simulation as simulation
+from . import snapshot as snapshot
 
 # from . import space as space
 from . import dynamics as dynamics
@@ -16,9 +18,14 @@ from . import format as format
 
 # Helper Methods:
 import functools
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from matplotlib import cm
+import importlib
+
+
+def __getattr__(name):
+    # Speckle connectivity is imported on first use, as specklepy's client is heavy:
+    if name == "api":
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
 
 
 def update_class(
@@ -47,7 +54,9 @@ def rgba_from_cmap(cmap_name, start_val, stop_val, val):
     Returns the rgb value of a color from a matplotlib colormap
     from https://stackoverflow.com/a/26109298
     """
-    cmap = plt.get_cmap(cmap_name)
+    import matplotlib as mpl
+
+    cmap = mpl.colormaps[cmap_name]
     norm = mpl.colors.Normalize(vmin=start_val, vmax=stop_val)
-    scalar_map = cm.ScalarMappable(norm=norm, cmap=cmap)
+    scalar_map = mpl.cm.ScalarMappable(norm=norm, cmap=cmap)
     return scalar_map.to_rgba(val)
@@ -1,13 +1,95 @@
+import json
 import os
+import pickle
+import sqlite3
+import zlib
+from typing import Iterator, Optional, Union
 
 from specklepy import objects
 from specklepy.api import client
 from specklepy.api import operations
+from specklepy.serialization.base_object_serializer import BaseObjectSerializer
+from specklepy.transports.abstract_transport import AbstractTransport
+from specklepy.transports.memory import MemoryTransport
 
 import rangekeeper as rk
 from rangekeeper import graph
 
 
+class Cache:
+    """
+    A local, content-addressed store of converted Entities (and Assemblies), keyed by
+    Speckle object id, in a SQLite database. Entities are stored pickled and compressed.
+    Since an object's id is a hash of its content, a cached Entity can be reused for any
+    object (in any version of a model) with the same id.
+    The Assemblies of loaded commits are stored separately (by their root object's id),
+    as a commit's root object is also converted (and cached) as an Entity in its own right,
+    to be reused where it is nested in another commit.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        for table in ["entities", "commits"]:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS {0} (id TEXT PRIMARY KEY, data BLOB)".format(
+                    table
+                )
+            )
+        self.hits = 0
+        """The count of Entities (and commits' Assemblies) retrieved from the cache"""
+
+    def __contains__(self, id: str) -> bool:
+        return (
+            self.connection.execute(
+                "SELECT 1 FROM entities WHERE id = ?", (id,)
+            ).fetchone()
+            is not None
+        )
+
+    def get(self, id: str) -> Optional[graph.Entity]:
+        return self._get(table="entities", id=id)
+
+    def put(self, entities: dict[str, graph.Entity]):
+        self._put(table="entities", entities=entities)
+
+    def get_commit(self, id: str) -> Optional[graph.Assembly]:
+        """
+        Returns the Assembly loaded from a commit (by its root object's id), if cached
+        """
+        return self._get(table="commits", id=id)
+
+    def put_commit(self, id: str, assembly: graph.Assembly):
+        self._put(table="commits", entities={id: assembly})
+
+    def _get(self, table: str, id: str) -> Optional[graph.Entity]:
+        row = self.connection.execute(
+            "SELECT data FROM {0} WHERE id = ?".format(table), (id,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def _put(self, table: str, entities: dict[str, graph.Entity]):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO {0} (id, data) VALUES (?, ?)".format(table),
+                [
+                    (
+                        id,
+                        zlib.compress(
+                            pickle.dumps(entity, protocol=pickle.HIGHEST_PROTOCOL)
+                        ),
+                    )
+                    for (id, entity) in entities.items()
+                ],
+            )
+
+    def close(self):
+        self.connection.close()
+
+
 class Speckle:
     def __init__(
         self,
@@ -47,21 +129,74 @@ class Speckle:
     # def get_metadata(self, stream_id: str):
     #     return self.client.stream.get(stream_id)
 
+    @staticmethod
+    def read(
+        obj_id: str = None,
+        transport: AbstractTransport = None,
+        path: Union[str, os.PathLike] = None,
+    ) -> objects.Base:
+        """
+        Reads an object tree from a local transport (e.g. a `SQLiteTransport` on disk),
+        or from a file of serialized (JSON) objects, without a server client.
+        The file is parsed as it is read, rather than read whole into a string first.
+        """
+        if path is not None:
+            serializer = BaseObjectSerializer(
+                read_transport=MemoryTransport() if transport is None else transport
+            )
+            with open(path, "r") as file:
+                return serializer.recompose_base(obj=json.load(file))
+        elif obj_id is not None and transport is not None:
+            return operations.receive(obj_id=obj_id, local_transport=transport)
+        else:
+            raise ValueError("Either a path, or an obj_id and transport, is required.")
+
     @staticmethod
     def parse(
         base: objects.Base,
         parsed: dict[str, objects.Base] = None,
     ) -> dict[str, objects.Base]:
+        """
+        Collects the Entity (and Assembly) Bases in a tree of Bases, by entityId,
+        in depth-first order.
+        """
         parsed = {} if parsed is None else parsed
+        for _ in Speckle.walk(base=base, parsed=parsed):
+            pass
+        return parsed
+
+    @staticmethod
+    def walk(
+        base: objects.Base,
+        parsed: dict[str, objects.Base] = None,
+    ) -> Iterator[objects.Base]:
+        """
+        Walks a tree of Bases depth-first, yielding each Entity (or Assembly) Base as it
+        is parsed (i.e. the first time its entityId is found, or when an Assembly
+        replaces an Entity of the same entityId). Each Base is visited once; Bases sharing
+        an entityId are compared by their Speckle `id` (hash), computed once per Base if absent.
+        """
+        parsed = {} if parsed is None else parsed
+        hashes = {}
+        visited = set()
+
+        stack = [base]
+        while stack:
+            base = stack.pop()
+            if not isinstance(base, objects.Base) or id(base) in visited:
+                continue
+            visited.add(id(base))
 
-        if isinstance(base, objects.Base):
             if rk.graph.is_entity(base):
                 if base["entityId"] not in parsed:
                     parsed[base["entityId"]] = base
+                    yield base
                 else:
                     existing = parsed[base["entityId"]]
-                    if operations.serialize(existing) == operations.serialize(base):
-                        pass
+                    if existing is base or Speckle._hash(
+                        existing, hashes
+                    ) == Speckle._hash(base, hashes):
+                        continue  # Identical, so its members have been parsed already
                     else:
                         print(
                             "Warning: Duplicate Entity {0} [{1}] found.".format(
@@ -83,6 +218,7 @@ class Speckle:
                                 "New Entity is an Assembly while existing Entity is not. Replacing with Assembly."
                             )
                             parsed[base["entityId"]] = base
+                            yield base
                         else:
                             raise Exception(
                                 "Error: Hashes do not match. \n"
@@ -96,14 +232,21 @@ class Speckle:
                                 )
                             )
 
+            # Push members in reverse, so they are parsed in order:
+            members = []
             for member_name in base.get_dynamic_member_names():
                 member = base[member_name]
                 if isinstance(member, objects.Base):
-                    parsed.update(Speckle.parse(base=member, parsed=parsed))
+                    members.append(member)
                 elif isinstance(member, list):
-                    for item in member:
-                        parsed.update(Speckle.parse(base=item, parsed=parsed))
-        return parsed
+                    members.extend(member)
+            stack.extend(reversed(members))
+
+    @staticmethod
+    def _hash(base: objects.Base, hashes: dict[int, str]) -> str:
+        if id(base) not in hashes:
+            hashes[id(base)] = base.id if base.id is not None else base.get_id()
+        return hashes[id(base)]
 
     @staticmethod
     def to_rk(bases: list[objects.Base], name: str, type: str) -> graph.Assembly:
@@ -112,6 +255,7 @@ class Speckle:
         entities = {base["entityId"]: rk.graph.Entity.from_base(base) for base in bases}
 
         assemblies = {}
+        relationships = []
         for assembly in [base for base in bases if rk.graph.is_assembly(base)]:
             subassembly = entities[assembly["entityId"]]
             edges = []
@@ -126,7 +270,96 @@ class Speckle:
                     if relationship["target"] is not None
                     else subassembly
                 )
-                subassembly.add_relationship((source, target, relationship["type"]))
-                root.add_relationship((source, target, relationship["type"]))
+                edges.append((source, target, relationship["type"]))
+            subassembly.add_relationships(edges)
+            relationships.extend(edges)
+
+        root.add_relationships(relationships)
+        return root
+
+    @staticmethod
+    def load(
+        obj_id: str,
+        transport: AbstractTransport,
+        name: str,
+        type: str,
+        cache: Cache,
+    ) -> graph.Assembly:
+        """
+        Returns the Assembly of an object tree, from the cache if it has been loaded before.
+        Otherwise the tree is read from the transport and ingested, reusing any of its
+        Entities already in the cache (i.e. from unchanged parts of a model).
+        """
+        assembly = cache.get_commit(obj_id)
+        if assembly is None:
+            assembly = Speckle.ingest(
+                base=Speckle.read(obj_id=obj_id, transport=transport),
+                name=name,
+                type=type,
+                cache=cache,
+            )
+            cache.put_commit(obj_id, assembly)
+        else:
+            assembly.name = name
+            assembly.type = type
+        return assembly
+
+    @staticmethod
+    def ingest(
+        base: objects.Base,
+        name: str,
+        type: str,
+        cache: Cache = None,
+    ) -> graph.Assembly:
+        """
+        Converts a tree of Bases into an Assembly in a single pass, creating each Entity
+        and its relationships as the tree is walked, rather than first collecting every
+        Base (as with `Speckle.parse` and `Speckle.to_rk`).
+        If a cache is provided, Entities are retrieved from (or added to) it by their
+        Bases' Speckle ids.
+        """
+        root = rk.graph.Assembly(name=name, type=type)
+        entities = {}
+        walked = set()
+        converted = {}
+        relationships = []
+
+        def convert(entitybase: objects.Base) -> graph.Entity:
+            if entitybase["entityId"] not in entities:
+                entity = None
+                if cache is not None and entitybase.id is not None:
+                    entity = cache.get(entitybase.id)
+                if entity is None:
+                    entity = rk.graph.Entity.from_base(entitybase)
+                    if entitybase.id is not None:
+                        converted[entitybase.id] = entity
+                entities[entitybase["entityId"]] = entity
+            return entities[entitybase["entityId"]]
+
+        for entitybase in Speckle.walk(base=base):
+            if entitybase["entityId"] in walked:  # An Assembly replacing an Entity
+                del entities[entitybase["entityId"]]
+            walked.add(entitybase["entityId"])
+            entity = convert(entitybase)
+
+            if rk.graph.is_assembly(entitybase):
+                edges = []
+                for relationship in entitybase["relationships"]:
+                    source = (
+                        convert(relationship["source"])
+                        if relationship["source"] is not None
+                        else entity
+                    )
+                    target = (
+                        convert(relationship["target"])
+                        if relationship["target"] is not None
+                        else entity
+                    )
+                    edges.append((source, target, relationship["type"]))
+                entity.add_relationships(edges)
+                relationships.extend(edges)
 
+        root.add_relationships(relationships)
+        if cache is not None:
+            cache.put(converted)
         return root
@@ -1,10 +1,15 @@
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 
 import enum
+import functools
+import warnings
 import numpy as np
 import scipy.stats as ss
+import scipy.stats.qmc as qmc
 from abc import abstractmethod
 
+import rangekeeper as rk
+
 
 class Type(enum.Enum):
     UNIFORM = "Uniform"  # Continuous uniform distribution or rectangular distribution
@@ -13,6 +18,75 @@ class Type(enum.Enum):
     PERT = "PERT"  # Transformation of the four-parameter Beta distribution defined by the minimum, most likely, and maximum values.
 
 
+class Sampling(enum.Enum):
+    RANDOM = "Random"  # Pseudo-random sampling
+    SOBOL = "Sobol"  # Scrambled Sobol' (quasi-random, low-discrepancy) sequence. Best with sizes that are powers of 2.
+    HALTON = "Halton"  # Scrambled Halton (quasi-random, low-discrepancy) sequence
+    LATIN_HYPERCUBE = "Latin Hypercube"  # One sample from each of `size` equiprobable strata (per dimension)
+    ANTITHETIC = "Antithetic"  # Pseudo-random samples in antithetic pairs (u, 1 - u)
+
+
+def uniforms(
+    size: int,
+    dimensions: int = 1,
+    sampling: Sampling = Sampling.RANDOM,
+    generator: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    Returns a (size × dimensions) array of samples of the standard uniform
+    distribution, drawn with the specified sampling method.
+    """
+    generator = np.random.default_rng() if generator is None else generator
+    if sampling is Sampling.SOBOL:
+        with warnings.catch_warnings():
+            # Scipy warns that Sobol' points lose their balance unless size is a power of 2:
+            warnings.simplefilter("ignore", UserWarning)
+            return qmc.Sobol(d=dimensions, seed=generator).random(size)
+    elif sampling is Sampling.HALTON:
+        return qmc.Halton(d=dimensions, seed=generator).random(size)
+    elif sampling is Sampling.LATIN_HYPERCUBE:
+        return qmc.LatinHypercube(d=dimensions, seed=generator).random(size)
+    elif sampling is Sampling.ANTITHETIC:
+        half = generator.random(size=((size + 1) // 2, dimensions))
+        return np.concatenate([half, 1 - half])[:size]
+    else:
+        return generator.random(size=(size, dimensions))
+
+
+@rk.profiling.instrument("sample")
+def sample(
+    forms: List["Form"],
+    size: int = 1,
+    sampling: Sampling = Sampling.RANDOM,
+    generator: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    Jointly samples a set of distributions, returning a (size × forms) array.
+    For quasi-random and Latin hypercube sampling, the distributions are the
+    dimensions of a single sequence (or hypercube), so that their combinations
+    are evenly spread.
+    If no generator is given, each form is sampled with its own generator (or, for
+    joint sampling, the sequence is scrambled by the first form's that has one).
+    """
+    if sampling is Sampling.RANDOM:
+        return np.column_stack(
+            [
+                np.broadcast_to(form.sample(size=size, generator=generator), (size,))
+                for form in forms
+            ]
+        )
+    if generator is None:
+        generator = next(
+            (form.generator for form in forms if form.generator is not None), None
+        )
+    samples = uniforms(
+        size=size, dimensions=len(forms), sampling=sampling, generator=generator
+    )
+    return np.column_stack(
+        [form.quantile(samples[:, i]) for (i, form) in enumerate(forms)]
+    )
+
+
 class Form:
     type: Type
 
@@ -20,7 +94,13 @@ class Form:
         self.generator = generator
         self.dist = ss.rv_continuous()
 
-    def sample(self, size: int = 1):
+    @rk.profiling.instrument("Form.sample")
+    def sample(
+        self,
+        size: int = 1,
+        sampling: Sampling = Sampling.RANDOM,
+        generator: Optional[np.random.Generator] = None,
+    ):
 
         if hasattr(self.dist, "b"):
             if self.dist.b == 0.0:
@@ -28,16 +108,39 @@ class Form:
                     self.dist.a
                 )  # If the distribution is a point mass, return the value of the point mass
 
-        if self.generator is None:
-            generator = np.random.default_rng()
-        else:
+        if generator is None:
             generator = self.generator
+        if generator is None:
+            generator = np.random.default_rng()
+        if sampling is not Sampling.RANDOM:
+            return self.quantile(
+                uniforms(size=size, sampling=sampling, generator=generator)[:, 0]
+            )
         return self.dist.rvs(size=size, random_state=generator)
 
-        # if size == 1:
-        #     return variates[0]
-        # else:
-        #     return variates
+    def quantile(self, probabilities: np.ndarray) -> np.ndarray:
+        """
+        Returns the inverse of the cumulative distribution at the given probabilities
+        (so that samples of the standard uniform distribution map to samples of this
+        distribution)
+        """
+        if self.dist.kwds.get("scale", 1.0) == 0:
+            # A point mass (zero-width) distribution:
+            return np.full(np.shape(probabilities), self.dist.kwds.get("loc", 0.0))
+        return self.dist.ppf(probabilities)
+
+    def tabulate(self, tolerance: float = 1e-4, tail: float = 1e-3) -> "Table":
+        """
+        Returns a (cached) inverse-CDF lookup Table of this distribution,
+        for fast, table-driven sampling
+        """
+        if not hasattr(self, "_tables"):
+            self._tables = {}
+        if (tolerance, tail) not in self._tables:
+            self._tables[(tolerance, tail)] = Table(
+                form=self, tolerance=tolerance, tail=tail
+            )
+        return self._tables[(tolerance, tail)]
 
     @abstractmethod
     def interval_density(self, parameters: [float]):
@@ -248,3 +351,143 @@ class PERT(Form):
 
     def cumulative_density(self, parameters: [float]) -> [float]:
         return super().cumulative_density(parameters)
+
+
+class Table:
+    """
+    A precomputed inverse-CDF lookup table of a distribution, sampled by linear
+    interpolation between nodes that are evenly spaced in probability (so that a
+    probability's interval is found by direct indexing, rather than a search).
+
+    The nodes span probabilities of `tail` to 1 - `tail`, and are doubled until
+    interpolating between them is within `tolerance` of the exact quantile at every
+    interval's midpoint, where `tolerance` is relative to the distribution's
+    interquartile range (so that it is independent of the distribution's scale).
+    Each tail is tabulated likewise, with nodes evenly spaced in log-probability
+    (down to probabilities of `floor`), beyond which the exact quantile function is
+    used.
+    This is worthwhile for distributions whose quantile function is expensive to
+    evaluate (e.g. PERT's, through the beta distribution).
+    """
+
+    def __init__(
+        self,
+        form: Form,
+        tolerance: float = 1e-4,
+        tail: float = 1e-3,
+        floor: float = 1e-12,
+        size: int = 257,
+        limit: int = 2**20,
+    ):
+        if not 0 < tail < 0.5:
+            raise ValueError("Error: Tail must be between 0 and 0.5 exclusive")
+        if not 0 < floor < tail:
+            raise ValueError("Error: Floor must be between 0 and the tail exclusive")
+        self.form = form
+        self.tolerance = tolerance
+        self.tail = tail
+        self.floor = floor
+
+        lower, upper = form.quantile(np.array([0.25, 0.75]))
+        threshold = tolerance * (upper - lower)
+        table = functools.partial(
+            _tabulate, threshold=threshold, size=size, limit=limit, tolerance=tolerance
+        )
+        self._body = table(form.quantile, start=tail, stop=1 - tail)
+        self._lower = table(
+            lambda logs: form.quantile(np.exp(logs)),
+            start=np.log(floor),
+            stop=np.log(tail),
+        )
+        self._upper = table(
+            lambda logs: form.quantile(-np.expm1(logs)),
+            start=np.log(floor),
+            stop=np.log(tail),
+        )
+        self.quantiles = self._body[2]
+        self.probabilities = np.linspace(tail, 1 - tail, self.quantiles.size)
+
+    def quantile(self, probabilities: np.ndarray) -> np.ndarray:
+        probabilities = np.asarray(probabilities, dtype=float)
+        quantiles = _interpolate(probabilities, *self._body)
+        for tail, table, log in [
+            (probabilities < self.tail, self._lower, np.log),
+            (probabilities > 1 - self.tail, self._upper, lambda p: np.log1p(-p)),
+        ]:
+            if tail.any():
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    logs = log(probabilities[tail])
+                    values = _interpolate(logs, *table)
+                beyond = ~(logs >= table[0])  # Including NaNs
+                if beyond.any():
+                    values[beyond] = self.form.quantile(probabilities[tail][beyond])
+                quantiles[tail] = values
+        return quantiles
+
+    @rk.profiling.instrument("Table.sample")
+    def sample(
+        self,
+        size: int = 1,
+        sampling: Sampling = Sampling.RANDOM,
+        generator: Optional[np.random.Generator] = None,
+    ) -> np.ndarray:
+        generator = self.form.generator if generator is None else generator
+        return self.quantile(
+            uniforms(size=size, sampling=sampling, generator=generator)[:, 0]
+        )
+
+
+def _tabulate(
+    quantile: Callable[[np.ndarray], np.ndarray],
+    start: float,
+    stop: float,
+    threshold: float,
+    size: int,
+    limit: int,
+    tolerance: float,
+) -> Tuple[float, float, np.ndarray, np.ndarray]:
+    """
+    Returns a table of quantiles at nodes evenly spaced from `start` to `stop`
+    (as the table's start, nodes per unit, quantiles and slopes between them),
+    doubling the nodes until linear interpolation is within `threshold` of the
+    quantile at every interval's midpoint
+    """
+    quantiles = quantile(np.linspace(start, stop, size))
+    while True:
+        # The midpoints of this table's intervals are the new nodes of the next:
+        width = (stop - start) / (quantiles.size - 1)
+        midpoints = quantile(
+            np.linspace(start + width / 2, stop - width / 2, quantiles.size - 1)
+        )
+        interpolated = (quantiles[:-1] + quantiles[1:]) / 2
+        if not (np.abs(midpoints - interpolated) > threshold).any():
+            break
+        if quantiles.size * 2 - 1 > limit:
+            raise ValueError(
+                "Error: Table would exceed {0} nodes to reach a tolerance of {1}".format(
+                    limit, tolerance
+                )
+            )
+        refined = np.empty(quantiles.size * 2 - 1)
+        refined[0::2] = quantiles
+        refined[1::2] = midpoints
+        quantiles = refined
+    return start, (quantiles.size - 1) / (stop - start), quantiles, np.diff(quantiles)
+
+
+def _interpolate(
+    values: np.ndarray,
+    start: float,
+    scale: float,
+    quantiles: np.ndarray,
+    slopes: np.ndarray,
+) -> np.ndarray:
+    # (Computed in place, as sampling is bound by the allocation of temporaries)
+    positions = values - start
+    positions *= scale
+    indices = positions.astype(np.intp)
+    np.clip(indices, 0, slopes.size - 1, out=indices)
+    positions -= indices  # Each value's position within its interval
+    positions *= slopes[indices]
+    positions += quantiles[indices]
+    return positions
@@ -3,4 +3,5 @@ from . import market as market
 from . import trend as trend
 from . import volatility as volatility
 from . import noise as noise
-from . import black_swan as black_swan
\ No newline at end of file
+from . import black_swan as black_swan
+from . import scenarios as scenarios
\ No newline at end of file
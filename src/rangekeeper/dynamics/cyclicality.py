@@ -1,7 +1,7 @@
 from __future__ import annotations
 import os
 import math
-from typing import Generator
+from typing import Generator, Optional
 
 import numpy as np
 import pandas as pd
@@ -338,9 +338,30 @@ class Cyclicality:
             space_cycle_asymmetric_parameter_dist: rk.distribution.Form,
             asset_cycle_asymmetric_parameter_dist: rk.distribution.Form,
             sequence: pd.PeriodIndex,
-            iterations: int = 1) -> [Cyclicality]:
-
-        space_cycle_phase_props = space_cycle_phase_prop_dist.sample(iterations)
+            iterations: int = 1,
+            sampling: rk.distribution.Sampling = rk.distribution.Sampling.RANDOM,
+            generator: Optional[np.random.Generator] = None) -> [Cyclicality]:
+        """
+        Generates Cyclicalities from the distributions of their parameters.
+        For quasi-random or Latin hypercube sampling, the distributions are sampled
+        jointly (as the dimensions of one sequence, scrambled by the generator).
+        """
+
+        samples = rk.distribution.sample(
+            forms=[
+                space_cycle_phase_prop_dist,
+                space_cycle_period_dist,
+                space_cycle_height_dist,
+                asset_cycle_period_diff_dist,
+                asset_cycle_phase_diff_prop_dist,
+                asset_cycle_amplitude_dist,
+                space_cycle_asymmetric_parameter_dist,
+                asset_cycle_asymmetric_parameter_dist],
+            size=iterations,
+            sampling=sampling,
+            generator=generator)
+
+        space_cycle_phase_props = samples[:, 0]
         """
         This distribution should generate the proportion of a full period at 
         which the space cycle starts. If you are unsure completely, then use a 
@@ -348,21 +369,21 @@ class Cyclicality:
         reflects your confidence of where the market is in the cycle. 
         """
 
-        space_cycle_periods = space_cycle_period_dist.sample(iterations)
+        space_cycle_periods = samples[:, 1]
         """
         This distribution should generate the cycle period governing 
         each market simulation (realistically between 10 and 20 years)
         """
 
-        space_cycle_heights = space_cycle_height_dist.sample(iterations)
+        space_cycle_heights = samples[:, 2]
 
-        asset_cycle_period_diffs = asset_cycle_period_diff_dist.sample(iterations)
+        asset_cycle_period_diffs = samples[:, 3]
         """
         Since the asset cycle period tracks the space cycle period, this 
         distribution should generate reasonable (+/- 1 year) differences
         """
 
-        asset_cycle_phase_props = asset_cycle_phase_diff_prop_dist.sample(iterations)
+        asset_cycle_phase_props = samples[:, 4]
         """
         The asset market phase is equal to the space market phase +/- some 
         random difference that is a pretty small fraction of the cycle period.
@@ -370,14 +391,14 @@ class Cyclicality:
         period, LR mean to either peak or trough is quarter period. 
         """
 
-        asset_cycle_amplitudes = asset_cycle_amplitude_dist.sample(iterations)
+        asset_cycle_amplitudes = samples[:, 5]
         """
         The amplitude of the asset cycle specifies cap rates, which may cycle 
         +/- 100 to 200 basis-points.
         """
 
-        space_cycle_asymmetric_params = space_cycle_asymmetric_parameter_dist.sample(iterations)
-        asset_cycle_asymmetric_params = asset_cycle_asymmetric_parameter_dist.sample(iterations)
+        space_cycle_asymmetric_params = samples[:, 6]
+        asset_cycle_asymmetric_params = samples[:, 7]
 
         args = [
             (space_cycle_phase_prop,
@@ -0,0 +1,412 @@
+from __future__ import annotations
+import copy
+import json
+import math
+import os
+import pickle
+import weakref
+
+from typing import Callable, Dict, List, Optional, Tuple, Any, Union
+
+import numpy as np
+import pandas as pd
+import multiprocess
+from multiprocess import shared_memory
+
+import rangekeeper as rk
+
+
+FLOWS = (
+    'space_market',
+    'asset_market',
+    'asset_true_value',
+    'space_market_price_factors',
+    'noisy_value',
+    'historical_value',
+    'implied_rev_cap_rate',
+    'returns')
+"""
+The Flows of a Market that are collected as scenario arrays by default
+"""
+
+_attached: Dict[str, Tuple[shared_memory.SharedMemory, _Block]] = {}
+"""
+Shared memory attached by this (worker) process (and the _Block its arrays are
+views of), until the attached Scenarios are closed.
+"""
+
+
+class Scenarios:
+    def __init__(
+            self,
+            arrays: Dict[str, np.ndarray],
+            dates: Dict[str, pd.DatetimeIndex],
+            params: Optional[Dict[str, Any]] = None,
+            path: Optional[Union[str, os.PathLike]] = None):
+        """
+        A batch of scenarios, as (scenarios × periods) arrays of named Flows
+        (e.g. a Market's price factors, cap rates and returns), with each
+        Flow's dates, and the parameters (and seeds) they were generated from
+        (e.g. the `entropy` and per-scenario `spawn_key`s of their SeedSequence).
+        Scenarios loaded from a store (memory-mapped) keep its path.
+        """
+        self.arrays = arrays
+        self.dates = dates
+        self.params = {} if params is None else params
+        self.path = path
+
+    def __len__(self) -> int:
+        return next(iter(self.arrays.values())).shape[0] if len(self.arrays) > 0 else 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def select(
+            self,
+            start: int,
+            stop: int) -> Scenarios:
+        """
+        Returns the scenarios from `start` to `stop`, as views of these scenarios' arrays
+        """
+        return Scenarios(
+            arrays={name: array[start:stop] for (name, array) in self.arrays.items()},
+            dates=self.dates,
+            params=self.params)
+
+    def take(
+            self,
+            indices: Union[List[int], np.ndarray]) -> Scenarios:
+        """
+        Returns a subset of the scenarios, by index (reading only those scenarios,
+        if memory-mapped)
+        """
+        return Scenarios(
+            arrays={name: np.asarray(array[indices]) for (name, array) in self.arrays.items()},
+            dates=self.dates,
+            params=self.params)
+
+    def to_flow(
+            self,
+            name: str,
+            scenario: int,
+            units=None) -> rk.flux.Flow:
+        return rk.flux.Flow(
+            movements=pd.Series(
+                data=self.arrays[name][scenario],
+                index=self.dates[name],
+                copy=False),
+            units=units,
+            name=name)
+
+    @classmethod
+    def from_markets(
+            cls,
+            markets: List[rk.dynamics.market.Market],
+            names: Tuple[str, ...] = FLOWS) -> Scenarios:
+        return cls(
+            arrays={
+                name: np.vstack([getattr(market, name).movements.to_numpy(dtype=float) for market in markets])
+                for name in names},
+            dates={name: getattr(markets[0], name).movements.index for name in names})
+
+    def share(self) -> SharedScenarios:
+        """
+        Copies these scenarios into shared memory
+        """
+        shared = SharedScenarios.allocate(
+            shapes={name: array.shape for (name, array) in self.arrays.items()},
+            dates=self.dates)
+        for name, array in self.arrays.items():
+            shared.arrays[name][:] = array
+        shared.params = self.params
+        return shared
+
+    def save(
+            self,
+            path: Union[str, os.PathLike]):
+        """
+        Saves these scenarios to a store: a directory of .npy arrays (one per Flow),
+        a JSON description of their dates, and the (pickled) generation parameters
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(path, name + '.npy'), np.asarray(array, dtype=float), allow_pickle=False)
+        with open(os.path.join(path, 'params.pkl'), 'wb') as file:
+            pickle.dump(self.params, file, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(path, 'scenarios.json'), 'w') as file:
+            json.dump(
+                {
+                    'count': len(self),
+                    'dates': {name: [date.isoformat() for date in dates] for (name, dates) in self.dates.items()}},
+                file)
+
+    @classmethod
+    def load(
+            cls,
+            path: Union[str, os.PathLike],
+            mmap: bool = True) -> Scenarios:
+        """
+        Loads scenarios from a store. If `mmap` is True, the arrays are memory-mapped
+        (read-only), so that only the scenarios accessed are read, and workers
+        mapping over them open the store themselves.
+        """
+        with open(os.path.join(path, 'scenarios.json'), 'r') as file:
+            description = json.load(file)
+        with open(os.path.join(path, 'params.pkl'), 'rb') as file:
+            params = pickle.load(file)
+        return cls(
+            arrays={
+                name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r' if mmap else None, allow_pickle=False)
+                for name in description['dates']},
+            dates={name: pd.DatetimeIndex(dates, name='date') for (name, dates) in description['dates'].items()},
+            params=params,
+            path=path if mmap else None)
+
+    def map(
+            self,
+            function: Callable[[Scenarios], Any],
+            chunksize: Optional[int] = None,
+            processes: Optional[int] = None) -> List[Any]:
+        """
+        Applies a function to chunks of these scenarios in a pool of worker
+        processes, which receive only a handle to the scenarios (in shared memory)
+        and the bounds of their chunk. Returns each chunk's result, in order.
+        """
+        if isinstance(self, SharedScenarios):
+            return _map(self.handle, len(self), function, chunksize, processes)
+        if self.path is not None:
+            return _map(FileHandle(self.path), len(self), function, chunksize, processes)
+        with self.share() as shared:
+            return _map(shared.handle, len(shared), function, chunksize, processes)
+
+    @classmethod
+    def from_likelihoods(
+            cls,
+            sequence: pd.PeriodIndex,
+            trends: [rk.dynamics.trend.Trend],
+            volatilities: [rk.dynamics.volatility.Volatility],
+            cyclicalities: [rk.dynamics.cyclicality.Cyclicality],
+            noise: rk.dynamics.noise.Noise,
+            black_swan: rk.dynamics.black_swan.BlackSwan,
+            names: Tuple[str, ...] = FLOWS,
+            seed: Optional[Union[int, np.random.SeedSequence]] = None,
+            chunksize: Optional[int] = None,
+            processes: Optional[int] = None) -> SharedScenarios:
+        """
+        Generates Markets in a pool of worker processes, which write their Flows
+        directly into shared scenario arrays (rather than returning pickled Markets).
+        Each scenario's Noise and BlackSwan are sampled with a generator seeded by
+        its own child of the `seed` SeedSequence, so that a scenario can be
+        reproduced (regardless of how scenarios are chunked across workers).
+        Each scenario's Trend parameters, and the `entropy` and `spawn_key` of its
+        SeedSequence, are kept as the Scenarios' params.
+        """
+        if min(len(trends), len(volatilities), len(cyclicalities)) == 0:
+            raise ValueError("Error: At least one Trend, Volatility and Cyclicality is required")
+        seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        seeds = seed.spawn(min(len(trends), len(volatilities), len(cyclicalities)))
+        args = [(sequence, trend, volatility, cyclicality) + _seeded(noise, black_swan, seed=child)
+                for (trend, volatility, cyclicality, child)
+                in zip(trends, volatilities, cyclicalities, seeds)]
+
+        first = Scenarios.from_markets(
+            markets=[rk.dynamics.market.Market._from_args(args[0])],
+            names=names)
+        shared = SharedScenarios.allocate(
+            shapes={name: (len(args),) + array.shape[1:] for (name, array) in first.arrays.items()},
+            dates=first.dates)
+        try:
+            for name, array in first.arrays.items():
+                shared.arrays[name][0] = array[0]
+            shared.params = {
+                'cap_rate': np.array([trend.cap_rate for trend in trends[:len(args)]]),
+                'growth_rate': np.array([trend.growth_rate for trend in trends[:len(args)]]),
+                'initial_value': np.array([trend.initial_value for trend in trends[:len(args)]]),
+                'entropy': seed.entropy,
+                'spawn_key': np.array([child.spawn_key for child in seeds])}
+
+            chunks = _chunks(count=len(args) - 1, chunksize=chunksize, processes=processes)
+            with multiprocess.Pool(_processes(processes)) as pool:
+                pool.map(
+                    _markets_from_args,
+                    [(shared.handle, start + 1, args[start + 1:stop + 1]) for (start, stop) in chunks])
+        except BaseException:
+            shared.close()  # Release (unlink) the shared memory, as it is not returned
+            raise
+        return shared
+
+
+class Handle:
+    def __init__(
+            self,
+            blocks: Dict[str, Tuple[str, Tuple[int, ...]]],
+            dates: Dict[str, pd.DatetimeIndex]):
+        """
+        A (picklable) reference to scenarios in shared memory
+        """
+        self.blocks = blocks
+        self.dates = dates
+
+    def attach(self) -> SharedScenarios:
+        attached = {name: _attach(block) for (name, (block, _)) in self.blocks.items()}
+        memories = {name: memory for (name, (memory, _)) in attached.items()}
+        return SharedScenarios(
+            arrays={
+                name: _array(attached[name][1], shape)
+                for (name, (_, shape)) in self.blocks.items()},
+            dates=self.dates,
+            memories=memories,
+            owner=False)
+
+
+class FileHandle:
+    def __init__(
+            self,
+            path: Union[str, os.PathLike]):
+        """
+        A reference to scenarios in a store, memory-mapped by each worker
+        """
+        self.path = path
+
+    def attach(self) -> Scenarios:
+        return Scenarios.load(self.path, mmap=True)
+
+
+class SharedScenarios(Scenarios):
+    def __init__(
+            self,
+            arrays: Dict[str, np.ndarray],
+            dates: Dict[str, pd.DatetimeIndex],
+            memories: Dict[str, shared_memory.SharedMemory],
+            owner: bool = True):
+        """
+        Scenarios whose arrays are held in shared memory. The owner of the
+        shared memory unlinks it when closed (or on exiting a `with` block), so that
+        no other process can attach it; other (attached) Scenarios only release it.
+        Arrays (and views of them, e.g. from `select` or `to_flow`) stay valid for as
+        long as they are referenced, even once closed: the shared memory is only
+        unmapped once the last of them is garbage collected.
+        """
+        super().__init__(arrays=arrays, dates=dates)
+        self.memories = memories
+        self.owner = owner
+        self.handle = Handle(
+            blocks={name: (memory.name, arrays[name].shape) for (name, memory) in memories.items()},
+            dates=dates)
+
+    @classmethod
+    def allocate(
+            cls,
+            shapes: Dict[str, Tuple[int, ...]],
+            dates: Dict[str, pd.DatetimeIndex]) -> SharedScenarios:
+        memories = {
+            name: shared_memory.SharedMemory(
+                create=True,
+                size=max(1, int(np.prod(shape)) * np.dtype(float).itemsize))
+            for (name, shape) in shapes.items()}
+        return cls(
+            arrays={
+                name: _array(_block(memories[name]), shape)
+                for (name, shape) in shapes.items()},
+            dates=dates,
+            memories=memories)
+
+    def close(self):
+        self.arrays = {}
+        for memory in self.memories.values():
+            if self.owner:
+                memory.unlink()
+            else:
+                _attached.pop(memory.name, None)
+        self.memories = {}
+
+    def __enter__(self) -> SharedScenarios:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _Block(np.ndarray):
+    """
+    The bytes of a block of shared memory. Scenario arrays are (plain ndarray)
+    views of a _Block, so that they, and any views of them, keep it alive: the
+    shared memory is closed (unmapped) once the _Block is garbage collected, rather
+    than when the Scenarios are closed (which would leave such arrays pointing at
+    unmapped memory).
+    """
+
+
+def _block(memory: shared_memory.SharedMemory) -> _Block:
+    block = _Block(shape=(memory.size,), dtype=np.uint8, buffer=memory.buf)
+    weakref.finalize(block, memory.close)
+    return block
+
+
+def _array(
+        block: _Block,
+        shape: Tuple[int, ...]) -> np.ndarray:
+    size = int(np.prod(shape)) * np.dtype(float).itemsize
+    return block.view(np.ndarray)[:size].view(float).reshape(shape)
+
+
+def _attach(block: str) -> Tuple[shared_memory.SharedMemory, _Block]:
+    if block not in _attached:
+        memory = shared_memory.SharedMemory(name=block)
+        _attached[block] = (memory, _block(memory))
+    return _attached[block]
+
+
+def _processes(processes: Optional[int] = None) -> int:
+    return os.cpu_count() if processes is None else processes
+
+
+def _chunks(
+        count: int,
+        chunksize: Optional[int] = None,
+        processes: Optional[int] = None) -> List[Tuple[int, int]]:
+    chunksize = math.ceil(count / _processes(processes)) if chunksize is None else chunksize
+    return [(start, min(start + chunksize, count)) for start in range(0, count, max(1, chunksize))]
+
+
+def _map(
+        handle: Union[Handle, FileHandle],
+        count: int,
+        function: Callable[[Scenarios], Any],
+        chunksize: Optional[int] = None,
+        processes: Optional[int] = None) -> List[Any]:
+    chunks = _chunks(count=count, chunksize=chunksize, processes=processes)
+    with multiprocess.Pool(min(_processes(processes), max(1, len(chunks)))) as pool:
+        return pool.map(_map_from_args, [(handle, start, stop, function) for (start, stop) in chunks])
+
+
+def _seeded(
+        noise: rk.dynamics.noise.Noise,
+        black_swan: rk.dynamics.black_swan.BlackSwan,
+        seed: np.random.SeedSequence) -> Tuple[rk.dynamics.noise.Noise, rk.dynamics.black_swan.BlackSwan]:
+    """
+    Returns copies of the Noise and BlackSwan whose distributions share a generator
+    seeded by `seed`
+    """
+    generator = np.random.default_rng(seed)
+    noise = copy.copy(noise)
+    noise.noise_dist = copy.copy(noise.noise_dist)
+    noise.noise_dist.generator = generator
+    black_swan = copy.copy(black_swan)
+    black_swan.probability = copy.copy(black_swan.probability)
+    black_swan.probability.generator = generator
+    return noise, black_swan
+
+
+def _map_from_args(args: tuple) -> Any:
+    handle, start, stop, function = args  # This is done to assist multiprocessing
+    return function(handle.attach().select(start, stop))
+
+
+def _markets_from_args(args: tuple):
+    handle, start, market_args = args
+    scenarios = handle.attach()
+    for i, arg in enumerate(market_args):
+        market = rk.dynamics.market.Market._from_args(arg)
+        for name, array in scenarios.arrays.items():
+            array[start + i] = getattr(market, name).movements.to_numpy(dtype=float)
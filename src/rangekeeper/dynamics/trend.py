@@ -3,6 +3,7 @@ import os
 
 from typing import Optional, Generator
 
+import numpy as np
 import pandas as pd
 import multiprocess
 
@@ -55,9 +56,14 @@ class Trend(rk.flux.Flow):
             growth_rate_dist: rk.distribution,
             initial_value_dist: rk.distribution,
             initial_price_factor: float = 1.,
-            iterations: int = 1) -> [Trend]:
-        growth_rates = growth_rate_dist.sample(size=iterations)
-        initial_values = initial_value_dist.sample(size=iterations)
+            iterations: int = 1,
+            sampling: rk.distribution.Sampling = rk.distribution.Sampling.RANDOM,
+            generator: Optional[np.random.Generator] = None) -> [Trend]:
+        growth_rates, initial_values = rk.distribution.sample(
+            forms=[growth_rate_dist, initial_value_dist],
+            size=iterations,
+            sampling=sampling,
+            generator=generator).T
 
         pool = multiprocess.Pool(os.cpu_count())
 
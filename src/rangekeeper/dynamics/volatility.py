@@ -29,8 +29,7 @@ class Volatility(rk.flux.Flow):
         """
 
         volatilities = pd.Series(
-            data=[sp.special.ndtri(rk.distribution.Uniform(lower=0, range=1).sample()[0]) * volatility_per_period
-                  for x in range(sequence.size)],
+            data=sp.special.ndtri(rk.distribution.Uniform(lower=0, range=1).sample(size=sequence.size)) * volatility_per_period,
             # the ndtri() function replicates excel's NORMSINV().
             # See https://stackoverflow.com/questions/20626994/how-to-calculate-the-inverse-of-the-normal-cumulative-distribution-function-in-p/20627638
             index=rk.duration.Sequence.to_datestamps(sequence=sequence))
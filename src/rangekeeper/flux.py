@@ -5,7 +5,6 @@ import json
 import os
 from typing import Dict, Union, Optional, Tuple, List
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import pint
@@ -58,6 +57,7 @@ class Flow:
     Note: the flow.movements Series index is a pd.DatetimeIndex, and its values are floats.
     """
 
+    @rk.profiling.instrument("Flow")
     def __init__(
         self,
         movements: pd.Series,
@@ -165,6 +165,8 @@ class Flow:
         *args,
         **kwargs,
     ):
+        import matplotlib.pyplot as plt
+
         self.movements.plot(*args, **kwargs)
         plt.legend(loc="best")
         plt.xlabel("Date")
@@ -381,6 +383,7 @@ class Flow:
         )
         return result.clean()
 
+    @rk.profiling.instrument("Flow.resample")
     def resample(
         self,
         frequency: rk.duration.Type,
@@ -470,6 +473,37 @@ class Flow:
 
         return trimmed
 
+    def is_aligned(
+        self,
+        frequency: rk.duration.Type,
+    ) -> bool:
+        """
+        Returns True if the Flow has exactly one movement at the end date of each
+        consecutive period of the specified frequency, such that resampling it
+        to that frequency would not change its dates.
+        Note: multi-period (e.g. BIENNIUM) and daily frequencies are never aligned,
+        as resampling to them does not label periods by their end dates.
+        """
+        index = self.movements.index
+        if index.size == 0 or not index.is_monotonic_increasing:
+            return False
+        if frequency == rk.duration.Type.DAY:
+            return False
+        if pd.tseries.frequencies.to_offset(rk.duration.Type.offset(frequency)).n != 1:
+            return False
+
+        sequence = rk.duration.Sequence.from_datestamps(
+            datestamps=index,
+            frequency=frequency,
+        )
+        if (
+            not sequence.is_unique
+            or sequence.size != (sequence[-1] - sequence[0]).n + 1
+        ):
+            return False
+        return index.equals(rk.duration.Sequence.to_datestamps(sequence=sequence))
+
+    @rk.profiling.instrument("Flow.to_periods")
     def to_periods(
         self,
         index: pd.PeriodIndex,
@@ -614,6 +648,7 @@ class Stream:
     A `Stream` collects constituent Flows and resamples them with a specified frequency.
     """
 
+    @rk.profiling.instrument("Stream")
     def __init__(
         self,
         flows: List[Flow],
@@ -791,6 +826,7 @@ class Stream:
         :param flows: A dictionary of flows to plot, by name and value range (as a tuple)
         :param normalize: If True, all flows will be normalized to the same scale
         """
+        import matplotlib.pyplot as plt
 
         flows = (
             flows
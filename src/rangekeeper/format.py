@@ -3,7 +3,6 @@ import decimal
 
 import babel.core
 import numpy as np
-import matplotlib
 import pandas as pd
 from babel import numbers, dates
 
@@ -216,11 +215,19 @@ def _to_color(
     range: Tuple[float, float] = (0, 1),
     missing: str = "#ffffff",
 ) -> str:
+    import matplotlib
+
     if pd.isna(value):
         return missing
     return str(matplotlib.colors.to_hex(cmap(np.interp(value, range, (0, 1)))))
 
 
+def _colormap(name: str):
+    import matplotlib
+
+    return matplotlib.colormaps[name]
+
+
 _to_color_vect = np.vectorize(_to_color, excluded=["cmap", "range"])
 
 
@@ -238,7 +245,7 @@ def to_color(
     :param missing:
     :return:
     """
-    colormap = matplotlib.colormaps[cmap]
+    colormap = _colormap(cmap)
     return _to_color_vect(value=value, cmap=colormap, range=range)
 
 
@@ -253,7 +260,7 @@ def to_scaled_colors(
     if diverging:
         extreme = max(abs(range[0]), abs(range[1]))
         range = (-extreme, extreme)
-    colormap = matplotlib.colormaps[cmap]
+    colormap = _colormap(cmap)
 
     return _to_color_vect(value=series, cmap=colormap, range=range, missing=missing)
 
@@ -263,7 +270,7 @@ def distinct_colors(
     cmap: str = "RdYlGn",
 ):
     range = np.linspace(0, 1, count)
-    colormap = matplotlib.colormaps[cmap]
+    colormap = _colormap(cmap)
     return _to_color_vect(value=range, cmap=colormap)
 
 
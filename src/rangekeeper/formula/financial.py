@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import enum
+import functools
 from typing import Union
 
-import numba
 import numpy as np
 import pandas as pd
 import pint
@@ -12,46 +12,35 @@ import rangekeeper as rk
 
 
 class Account:
-    startings: rk.flux.Flow
-    endings: rk.flux.Flow
-    overdraft: rk.flux.Flow
-    interest: rk.flux.Flow
-
     @staticmethod
     # @numba.jit
     def _calculate(
         starting: float,
-        transactions: numba.typed.List,
-        rates: numba.typed.List,
+        transactions: np.ndarray,
+        rates: np.ndarray,
         type: str,
         arrears: bool = False,
-    ) -> (
-        numba.typed.List,
-        numba.typed.List,
-        numba.typed.List,
-        numba.typed.List,
-    ):
+    ) -> np.ndarray:
         """
         Calculate the balance of a financial account given a starting balance and a series of transactions.
-        Returns a tuple of (startings, endings, overdraft, interest) as `numba.typed.List`s
+        Returns a (4, n) array whose rows are the (startings, endings, overdraft, interest) of each period.
+        Note: overdraft is returned cumulatively.
         """
-        startings = numba.typed.List.empty_list(numba.float64)
-        endings = numba.typed.List.empty_list(numba.float64)
-        overdrafts = numba.typed.List.empty_list(numba.float64)
-        interests = numba.typed.List.empty_list(numba.float64)
+        results = np.zeros(shape=(4, len(transactions)), dtype=np.float64)
+        startings, endings, overdrafts, interests = results
 
         for i in range(len(transactions)):
             if i == 0:
                 principal = starting + (0 if arrears else transactions[i])
-                startings.append(np.float64(starting) if starting > 0 else 0)
+                startings[i] = starting if starting > 0 else 0
             else:
-                startings.append(endings[-1])
+                startings[i] = endings[i - 1]
                 principal = (
-                    overdrafts[-1] + startings[i] + (0 if arrears else transactions[i])
+                    overdrafts[i - 1]
+                    + startings[i]
+                    + (0 if arrears else transactions[i])
                 )
-                # overdrafts.append(overdrafts[-1])
 
-            # principal = overdrafts[-1] + startings[i] + transactions[i]
             if type == "simple":
                 interest = principal * rates[i] if principal > 0 else 0
                 principal = principal
@@ -59,7 +48,6 @@ class Account:
             elif type == "compound":
                 interest = principal * rates[i] if principal > 0 else 0
                 principal = principal + interest
-                # endings.append(principal + interest)
 
             elif type == "capitalized":
                 # Since we are capitalizing interest, the amount (draw) must include interest to pay on the principal.
@@ -68,7 +56,6 @@ class Account:
                     (principal * rates[i]) / (1 - rates[i]) if principal > 0 else 0
                 )
                 principal = principal + interest
-                # endings.append(principal + interest)
 
             else:
                 raise ValueError(f"Invalid instrument: {type}")
@@ -77,21 +64,22 @@ class Account:
                 principal += transactions[i]
 
             if principal < 0:
-                overdrafts.append(principal)
-                endings.append(0)
+                overdrafts[i] = principal
+                endings[i] = 0
             else:
-                overdrafts.append(0)
-                endings.append(principal)
+                overdrafts[i] = 0
+                endings[i] = principal
 
-            interests.append(interest)
+            interests[i] = interest
 
-        return (startings, endings, overdrafts, interests)
+        return results
 
     class Type(enum.Enum):
         SIMPLE = "simple"
         COMPOUND = "compound"
         CAPITALIZED = "capitalized"
 
+    @rk.profiling.instrument("Account")
     def __init__(
         self,
         transactions: rk.flux.Flow,
@@ -102,25 +90,21 @@ class Account:
         arrears: bool = False,
         name: str = "",
     ):
-        transactions = transactions.resample(frequency=frequency)
+        if transactions.is_aligned(frequency=frequency):
+            # Resampling an aligned Flow would only sum its NaNs to zero:
+            amounts = np.nan_to_num(transactions.movements.to_numpy(dtype=np.float64))
+        else:
+            transactions = transactions.resample(frequency=frequency)
+            amounts = transactions.movements.to_numpy(dtype=np.float64)
         name = f"{name.strip()} "  # Add space to end of name
 
-        if isinstance(rate, float):
-            rate = rk.flux.Flow.from_projection(
-                name=f"{name}Interest Rates",
-                value=rate,
-                proj=rk.projection.Extrapolation(
-                    form=rk.extrapolation.Recurring(),
-                    sequence=rk.duration.Sequence.from_datestamps(
-                        datestamps=transactions.movements.index,
-                        frequency=frequency,
-                    ),
-                ),
-            )
+        if isinstance(rate, (int, float)):
+            rates = np.full(shape=amounts.size, fill_value=rate, dtype=np.float64)
         else:
             assert len(rate.movements.index) == len(
                 transactions.movements.index
             ), "Rate must be a Flow with the same number of periods as transactions."
+            rates = rate.movements.to_numpy(dtype=np.float64)
 
         if isinstance(starting, pint.Quantity):
             if starting.units != transactions.units:
@@ -129,55 +113,60 @@ class Account:
                 )
             starting = starting.magnitude
 
-        startings, endings, overdraft, interest = self._calculate(
-            starting=starting,
-            transactions=numba.typed.List(transactions.movements.to_list()),
-            rates=numba.typed.List(rate.movements.to_list()),
+        self._results = self._calculate(
+            starting=float(starting),
+            transactions=amounts,
+            rates=rates,
             type=type.value,
             arrears=arrears,
         )
+        # Overdraft: Cumulative -> Incremental
+        self._results[2] = np.diff(self._results[2], prepend=0)
+        self._index = transactions.movements.index
+        self._units = transactions.units
+        self._prefix = name
 
         self.name = f"{name} Account"
 
-        startings = rk.flux.Flow(
-            movements=pd.Series(
-                startings,
-                index=transactions.movements.index,
-            ),
-            units=transactions.units,
-            name=f"{name}Start Balance",
-        )
-        self.startings = startings.clean()
-
-        endings = rk.flux.Flow(
-            movements=pd.Series(
-                endings,
-                index=transactions.movements.index,
-            ),
-            units=transactions.units,
-            name=f"{name}End Balance",
-        )
-        self.endings = endings.clean()
-
-        overdraft = rk.flux.Flow(
-            movements=pd.Series(
-                np.diff(overdraft, prepend=0),  # Cumulative -> Incremental
-                index=transactions.movements.index,
-            ),
-            units=transactions.units,
-            name=f"{name} Overdraft",
-        )
-        self.overdraft = overdraft.clean(zeroes=True)
-
-        interest = rk.flux.Flow(
-            movements=pd.Series(
-                interest,
-                index=transactions.movements.index,
-            ),
-            units=transactions.units,
-            name=f"{name}Interest Amounts",
+    def _to_flow(
+        self,
+        row: int,
+        name: str,
+        zeroes: bool = False,
+    ) -> rk.flux.Flow:
+        """
+        Returns a row of the calculated results as a Flow over the shared date index.
+        The Flow's movements are a view on the results unless NaNs (or zeroes) must be cleaned.
+        """
+        data = self._results[row]
+        mask = ~np.isnan(data)
+        if zeroes:
+            mask &= data != 0
+        if mask.all():
+            movements = pd.Series(data, index=self._index, copy=False)
+        else:
+            movements = pd.Series(data[mask], index=self._index[mask])
+        return rk.flux.Flow(
+            movements=movements,
+            units=self._units,
+            name=name,
         )
-        self.interest = interest.clean()
+
+    @functools.cached_property
+    def startings(self) -> rk.flux.Flow:
+        return self._to_flow(row=0, name=f"{self._prefix}Start Balance")
+
+    @functools.cached_property
+    def endings(self) -> rk.flux.Flow:
+        return self._to_flow(row=1, name=f"{self._prefix}End Balance")
+
+    @functools.cached_property
+    def overdraft(self) -> rk.flux.Flow:
+        return self._to_flow(row=2, name=f"{self._prefix} Overdraft", zeroes=True)
+
+    @functools.cached_property
+    def interest(self) -> rk.flux.Flow:
+        return self._to_flow(row=3, name=f"{self._prefix}Interest Amounts")
 
     def diff(
         self,
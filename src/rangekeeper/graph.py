@@ -2,18 +2,29 @@ from __future__ import annotations
 
 import os
 import uuid
-from typing import List, Union, Optional, Callable, Any
-
-import matplotlib as mpl
+import weakref
+from typing import (
+    TYPE_CHECKING,
+    List,
+    Dict,
+    Union,
+    Optional,
+    Callable,
+    Any,
+    Iterator,
+)
+
+import multiprocess
 import networkx as nx
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 import specklepy.objects as objects
-from IPython.display import IFrame
-from pyvis import network
 
 import rangekeeper as rk
 
+if TYPE_CHECKING:
+    from pyvis import network
+
 
 # from . import measure
 
@@ -86,8 +97,77 @@ def is_assembly(base: objects.Base) -> bool:
         return False
 
 
+_unlisted = [
+    "applicationId",
+    "graph",
+    "speckle_type",
+    "totalChildrenCount",
+    "units",
+    "@displayValue",
+    "renderMaterial",
+]
+"""Members that are not listed as Entity properties"""
+
+
+class _Dirty(set):
+    """
+    The entityIds of an aggregation's Entities whose property has been assigned
+    since they were last aggregated. Entities hold only weak references to it, so it
+    is discarded with its aggregation.
+    """
+
+
+def _as_tuple(watchers: Union[weakref.ref, tuple]) -> tuple:
+    return watchers if isinstance(watchers, tuple) else (watchers,)
+
+
+class _Graph(nx.MultiDiGraph):
+    """
+    An Assembly's graph, which counts its edits (of nodes or edges), so that the
+    Assembly can tell when it has been modified directly rather than through the
+    Assembly. (Bulk edits are counted through the single edits they make.)
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.edits = 0
+        super().__init__(*args, **kwargs)
+
+    def add_node(self, *args, **kwargs):
+        self.edits += 1
+        return super().add_node(*args, **kwargs)
+
+    def add_nodes_from(self, *args, **kwargs):
+        self.edits += 1
+        return super().add_nodes_from(*args, **kwargs)
+
+    def remove_node(self, *args, **kwargs):
+        self.edits += 1
+        return super().remove_node(*args, **kwargs)
+
+    def remove_nodes_from(self, *args, **kwargs):
+        self.edits += 1
+        return super().remove_nodes_from(*args, **kwargs)
+
+    def add_edge(self, *args, **kwargs):
+        self.edits += 1
+        return super().add_edge(*args, **kwargs)
+
+    def remove_edge(self, *args, **kwargs):
+        self.edits += 1
+        return super().remove_edge(*args, **kwargs)
+
+    def clear(self):
+        self.edits += 1
+        return super().clear()
+
+    def clear_edges(self):
+        self.edits += 1
+        return super().clear_edges()
+
+
 class Entity(objects.Base):
     entityId: str
+    _watchers: Dict[str, Union[weakref.ref, tuple[weakref.ref, ...]]]
 
     def __str__(self):
         return (
@@ -124,6 +204,45 @@ class Entity(objects.Base):
         self.name = name if name is not None else "[Unnamed]"
         self.type = type if type is not None else "[Unknown]"
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        self._revise(name)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        super().__setitem__(name, value)
+        self._revise(name)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop("_watchers", None)  # Watchers are local to this process
+        return state
+
+    def _revise(self, name: str):
+        """
+        Marks the Entity as changed in the aggregations watching the (assigned) property,
+        so that they re-aggregate only the Entities whose properties have changed.
+        """
+        watchers = self.__dict__.get("_watchers")
+        if watchers is not None and name in watchers:
+            for watcher in _as_tuple(watchers[name]):
+                dirty = watcher()
+                if dirty is not None:
+                    dirty.add(self.__dict__["entityId"])
+
+    def _watch(self, name: str, watcher: weakref.ref):
+        """
+        Registers a (weak reference to an) aggregation's set of changed Entities,
+        to be marked when the property is assigned
+        """
+        watchers = self.__dict__.setdefault("_watchers", {})
+        if name in watchers:
+            # Watchers of aggregations that have since been discarded are dead references:
+            watchers[name] = tuple(
+                live for live in _as_tuple(watchers[name]) if live() is not None
+            ) + (watcher,)
+        else:
+            watchers[name] = watcher  # A single watcher is held as is
+
     def try_get_attribute(self, key):
         try:
             return self[key]
@@ -178,6 +297,7 @@ class Entity(objects.Base):
         ]
         return incoming + outgoing
 
+    @rk.profiling.instrument("Entity.get_relatives")
     def get_relatives(
         self,
         relationship_type: Union[str, None] = None,
@@ -185,77 +305,14 @@ class Entity(objects.Base):
         assembly: Assembly = None,
     ) -> List[Entity]:
 
-        relationships = self.get_relationships(assembly)
-        if relationship_type is not None:
-            relationships = [
-                relationship
-                for relationship in relationships
-                if relationship[0] == relationship_type
-            ]
-
-        if outgoing:
-            relationships = [
-                relationship
-                for relationship in relationships
-                if relationship[1] == "outgoing"
-            ]
-
-        elif not outgoing:
-            relationships = [
-                relationship
-                for relationship in relationships
-                if relationship[1] == "incoming"
-            ]
-
-        return [assembly.get_entity(relationship[2]) for relationship in relationships]
-
-    def _aggregate(
-        self,
-        assembly: rk.graph.Assembly,
-        property: str,
-        label: str,
-        relationship_type: str = None,
-        function: Optional[Callable] = None,
-        outgoing: bool = True,
-    ) -> dict[str, Any]:
-
-        aggregation = {
-            (self.entityId, self["name"]): (
-                self[property] if hasattr(self, property) else None
-            )
-        }
-        # print('Added {0} of {1} to partial in {3}'.format(property_name, self.name, aggregation_name, self.name))
-
-        relatives = self.get_relatives(
-            relationship_type=relationship_type, outgoing=outgoing, assembly=assembly
-        )
-
-        # print('Found {0} relatives: {1}'.format(len(relatives), [relative.name for relative in relatives]))
-        for relative in relatives:
-            aggregation.update(
-                relative._aggregate(
-                    assembly=assembly,
-                    function=function,
-                    property=property,
-                    label=label,
-                    relationship_type=relationship_type,
-                    outgoing=outgoing,
-                )
+        return [
+            assembly.get_entity(entityId)
+            for entityId in assembly._get_relatives(
+                entityId=self["entityId"],
+                relationship_type=relationship_type,
+                outgoing=outgoing,
             )
-
-        # print('State of partial for {0}: {1}'.format(self.name, partial))
-        if hasattr(self, label):
-            if function is None:
-                self[label] += sum(filter(None, aggregation.values()))
-            else:
-                self[label] += function(aggregation=aggregation, entity=self)
-        else:
-            if function is None:
-                self[label] = sum(filter(None, aggregation.values()))
-            else:
-                self[label] = function(aggregation=aggregation, entity=self)
-        # print('State of {0} for {1}: {2}'.format(aggregation_name, self.name, self[aggregation_name]))
-        return aggregation
+        ]
 
     @staticmethod
     def aggregate_flows(
@@ -294,43 +351,25 @@ class Entity(objects.Base):
         arborescence: bool = False,
         properties: List[str] = None,
     ) -> dict:
-        filtered = [
-            "applicationId",
-            "graph",
-            "speckle_type",
-            "totalChildrenCount",
-            "units",
-            "@displayValue",
-            "renderMaterial",
-        ]
         keys = properties
         if properties is None:
             keys = list(
-                filter(lambda key: key not in filtered, self.get_member_names())
+                filter(lambda key: key not in _unlisted, self.get_member_names())
             )
         attributes = {key: self.try_get_attribute(key) for key in keys}
-        relationships = self.get_relationships(assembly=assembly)
         if arborescence is False:
-            attributes["relationships"] = relationships
+            attributes["relationships"] = self.get_relationships(assembly=assembly)
         else:
-            parents = self.get_relatives(assembly=assembly, outgoing=False)
-            if len(parents) > 1:
-                raise ValueError(
-                    "Multiple parents found for {0} in {1}".format(
-                        self["entityId"], arborescence
-                    )
-                )
-            children = self.get_relatives(assembly=assembly, outgoing=True)
-
             attributes.update(
                 {
-                    "parent": None if len(parents) == 0 else parents[0]["entityId"],
-                    "children": [child["entityId"] for child in children],
+                    "parent": assembly._get_labels()[self["entityId"]]["parent"],
+                    "children": assembly._get_relatives(entityId=self["entityId"]),
                 }
             )
 
         return attributes
 
+    @rk.profiling.instrument("Entity.get_ancestors")
     def get_ancestors(
         self, relationship_type: str = None, assembly: Assembly = None
     ) -> dict[str, Entity]:
@@ -340,24 +379,24 @@ class Entity(objects.Base):
             tree = assembly
         else:
             tree = assembly.filter_by_type(relationship_type=relationship_type)
-        if not nx.is_arborescence(tree.graph):
+        if not tree._is_arborescence():
             raise Exception("The Assembly is not a tree. Cannot calculate ancestors.")
 
-        ancestors = {}
-        parents = self.get_relatives(
-            outgoing=False, relationship_type=relationship_type, assembly=tree
-        )
-        if len(parents) > 0:
-            parent = parents[0]
-            ancestors[parent["entityId"]] = parent
-            ancestors.update(
-                parent.get_ancestors(relationship_type=relationship_type, assembly=tree)
-            )
-        return ancestors
+        labels = tree._get_labels()
+        path = labels[self["entityId"]]["path"] if self["entityId"] in labels else ()
+        return {entityId: tree.get_entity(entityId) for entityId in reversed(path)}
 
 
 class Assembly(Entity):
     graph: nx.MultiDiGraph
+    _entities: Dict[str, Entity]
+    _successors: Optional[dict]
+    _predecessors: Optional[dict]
+    _subgraphs: dict
+    _arborescence: Optional[bool]
+    _labels: Optional[dict]
+    _aggregations: dict
+    _indexed: Optional[tuple]
 
     def __repr__(self):
         return "Assembly: {0} (Type: {1})".format(
@@ -383,7 +422,21 @@ class Assembly(Entity):
 
     def __init__(self, entityId: str = None, name: str = None, type: str = None):
         super().__init__(entityId, name, type)
-        self.graph = nx.MultiDiGraph()
+        self.graph = _Graph()
+        self._entities = {}
+        """An index of the graph's Entities by entityId"""
+        self._successors = None
+        """An index of each Entity's successors' entityIds, by relationship type"""
+        self._predecessors = None
+        """An index of each Entity's predecessors' entityIds, by relationship type"""
+        self._subgraphs = {}
+        """A cache of the Assembly's subgraph views, by relationship type"""
+        self._arborescence = None
+        self._labels = None
+        self._aggregations = {}
+        """The state of each aggregation, by label, for incremental re-aggregation"""
+        self._indexed = self._get_signature()
+        """The graph (and its size or edits) when the Entities were last indexed"""
 
     @classmethod
     def from_graph(cls, graph: nx.MultiDiGraph, name: str = None, type: str = None):
@@ -393,8 +446,11 @@ class Assembly(Entity):
             type=type if type is not None else "[Unknown]",
         )
         assembly.graph = graph
+        assembly._entities = nx.get_node_attributes(graph, "entity")
+        assembly._indexed = assembly._get_signature()
         return assembly
 
+    @rk.profiling.instrument("Assembly.filter_by_type")
     def filter_by_type(
         self,
         name: str = None,
@@ -408,14 +464,20 @@ class Assembly(Entity):
                 "Either relationship_type or entity_type must be provided."
             )
         name = "{0} by {1} and {2}".format(self["name"], relationship_type, entity_type)
+        cache = type is None and entity_type is None and is_assembly is None
         type = "subgraph" if type is None else type
 
         if relationship_type is not None:
+            if cache:
+                self._get_index()
+                if relationship_type in self._subgraphs:
+                    return self._subgraphs[relationship_type]
+            successors = self._get_adjacency()[0].get(relationship_type, {})
             graph = self.graph.edge_subgraph(
                 [
-                    edge
-                    for edge in self.graph.edges(keys=True)
-                    if edge[2] == relationship_type
+                    (source, target, relationship_type)
+                    for (source, targets) in successors.items()
+                    for target in targets
                 ]
             )
         else:
@@ -454,7 +516,10 @@ class Assembly(Entity):
                     ]
                 )
 
-        return Assembly.from_graph(graph=graph, name=name, type=type)
+        subgraph = Assembly.from_graph(graph=graph, name=name, type=type)
+        if cache:
+            self._subgraphs[relationship_type] = subgraph
+        return subgraph
 
     @classmethod
     def from_assemblybase(
@@ -483,6 +548,7 @@ class Assembly(Entity):
                 assembly.__setattr__(member_name, value)
 
         # if relatives is not None:
+        relationships = []
         for relationship in base["relationships"]:
             if relatives is not None:
                 source = relatives[relationship["source"]["entityId"]]
@@ -508,96 +574,234 @@ class Assembly(Entity):
             #     if relatives is not None
             #     else (None if relationship["target"] is not None) else assembly
             # )
-            assembly.add_relationship(
+            relationships.append(
                 (
                     source,
                     target,
                     relationship["type"],
                 )
             )
+        assembly.add_relationships(relationships)
         return assembly
 
+    def _get_index(self) -> dict[str, Entity]:
+        """
+        Returns the index of Entities by entityId, rebuilding it if the graph
+        has been replaced, or its nodes or edges added or removed other than through
+        the Assembly.
+        (Subgraph views are frozen, and are discarded when their graph is reindexed.)
+        """
+        if not nx.is_frozen(self.graph) and self._indexed != self._get_signature():
+            self.reindex()
+        return self._entities
+
+    def _get_signature(self) -> tuple[nx.MultiDiGraph, int, int]:
+        # An Assembly's own graph counts its edits; any other (e.g. assigned) graph's
+        # edges are counted (in time proportional to its size):
+        edits = getattr(self.graph, "edits", None)
+        return (
+            self.graph,
+            len(self.graph),
+            self.graph.number_of_edges() if edits is None else edits,
+        )
+
+    def reindex(self):
+        """
+        Rebuilds the Assembly's indices and clears its cached subgraph views.
+        (Done automatically when the graph is modified other than through the
+        Assembly.)
+        """
+        self._entities = nx.get_node_attributes(self.graph, "entity")
+        self._indexed = self._get_signature()
+        self._successors = None
+        self._predecessors = None
+        self._invalidate()
+
+    def _invalidate(self):
+        self._subgraphs = {}
+        self._arborescence = None
+        self._labels = None
+        self._aggregations = {}
+
+    def _get_adjacency(self) -> tuple[dict, dict]:
+        """
+        Returns the successor and predecessor indices of the graph, as dicts of
+        {relationship type: {entityId: {relative entityId: None}}}.
+        The number of an Entity's relatives in either index is its out- (or in-) degree.
+        """
+        self._get_index()
+        if self._successors is None:
+            self._successors = {}
+            self._predecessors = {}
+            for source, target, type in self.graph.edges(keys=True):
+                self._index_relationship(source, target, type)
+        return self._successors, self._predecessors
+
+    def _index_relationship(self, source: str, target: str, type: str):
+        self._successors.setdefault(type, {}).setdefault(source, {})[target] = None
+        self._predecessors.setdefault(type, {}).setdefault(target, {})[source] = None
+
+    def _get_relatives(
+        self,
+        entityId: str,
+        relationship_type: Optional[str] = None,
+        outgoing: Optional[bool] = True,
+    ) -> list[str]:
+        index = self._get_adjacency()[0 if outgoing else 1]
+        types = index.keys() if relationship_type is None else [relationship_type]
+        return [
+            relative
+            for type in types
+            for relative in index.get(type, {}).get(entityId, {})
+        ]
+
+    def _get_labels(self) -> dict[str, dict]:
+        """
+        Returns the position of each Entity in an arborescent Assembly, labelled in a
+        single depth-first pass from its root: the Entity's parent's entityId, its depth,
+        its ancestors' entityIds (from the root) and its trunk index (the index of the
+        root's child it descends from).
+        """
+        if self._labels is None:
+            if not self._is_arborescence():
+                raise ValueError(
+                    "The Assembly is not a tree. Cannot label its Entities."
+                )
+
+            root = next(
+                entityId for (entityId, degree) in self.graph.in_degree() if degree == 0
+            )
+            labels = {root: {"parent": None, "depth": 0, "path": (), "trunk": None}}
+            stack = [root]
+            while stack:
+                entityId = stack.pop()
+                label = labels[entityId]
+                path = label["path"] + (entityId,)
+                for i, child in enumerate(self._get_relatives(entityId=entityId)):
+                    labels[child] = {
+                        "parent": entityId,
+                        "depth": label["depth"] + 1,
+                        "path": path,
+                        "trunk": i if entityId == root else label["trunk"],
+                    }
+                    stack.append(child)
+            self._labels = labels
+        return self._labels
+
+    def _is_arborescence(self) -> bool:
+        self._get_index()
+        if self._arborescence is None:
+            self._arborescence = nx.is_arborescence(self.graph)
+        return self._arborescence
+
     def add_entities(self, entities: List[Entity]):
-        self.graph.add_nodes_from(entities)
-        nx.set_node_attributes(self.graph, entities, "entity")
+        index = self._get_index()
+        self.graph.add_nodes_from(
+            (entity["entityId"], {"entity": entity}) for entity in entities
+        )
+        index.update({entity["entityId"]: entity for entity in entities})
+        self._indexed = self._get_signature()
+        self._invalidate()
 
     def get_entities(self, entityIds: list[str] = None) -> dict[str, Entity]:
-        entities = nx.get_node_attributes(self.graph, "entity")
+        entities = self._get_index()
         if entityIds is None:
-            return entities
+            return dict(entities)
         else:
             return {entityId: entities[entityId] for entityId in entityIds}
 
     def get_entity(self, entityId: str) -> Entity:
-        return self.get_entities([entityId])[entityId]
+        return self._get_index()[entityId]
 
     def add_relationship(self, relationship: tuple[Entity, Entity, str]):
-        self.graph.add_edge(
-            relationship[0]["entityId"],
-            relationship[1]["entityId"],
-            key=relationship[2],
-        )
-        nx.set_node_attributes(
-            G=self.graph,
-            values={
-                relationship[0]["entityId"]: relationship[0],
-                relationship[1]["entityId"]: relationship[1],
-            },
-            name="entity",
-        )
+        self.add_relationships([relationship])
 
     def add_relationships(self, relationships: List[tuple[Entity, Entity, str]]):
-        for relationship in relationships:
-            self.add_relationship(relationship)
+        """
+        Adds relationships (source Entity, target Entity, relationship type) to the graph
+        in bulk. Each Entity is written to its node once (where several Entities share an
+        entityId, the last is kept, as with successive calls to `add_relationship`).
+        """
+        entities = {}
+        edges = []
+        for source, target, type in relationships:
+            entities[source["entityId"]] = source
+            entities[target["entityId"]] = target
+            edges.append((source["entityId"], target["entityId"], type, {}))
+
+        index = self._get_index()
+        self.graph.add_nodes_from(
+            (entityId, {"entity": entity}) for (entityId, entity) in entities.items()
+        )
+        self.graph.add_edges_from(edges)
+        index.update(entities)
+        self._indexed = self._get_signature()
+        if self._successors is not None:
+            for source, target, type, _ in edges:
+                self._index_relationship(source, target, type)
+        self._invalidate()
 
     def get_roots(self) -> dict[str, list[Entity]]:
-        types = set(edge[2] for edge in self.graph.edges(keys=True))
-        roots = {}
-        for type in types:
-            subgraph = self.filter_by_type(relationship_type=type).graph
-            roots[type] = [
-                self.get_entity(node)
-                for node in subgraph.nodes()
-                if subgraph.in_degree(node) == 0
+        successors, predecessors = self._get_adjacency()
+        return {
+            type: [
+                self.get_entity(entityId)
+                for entityId in successors[type]
+                if entityId not in predecessors[type]
             ]
-        return roots
+            for type in successors
+        }
 
     def get_leaves(self) -> dict[str, list[Entity]]:
-        types = set(edge[2] for edge in self.graph.edges(keys=True))
-        leaves = {}
-        for type in types:
-            subgraph = self.filter_by_type(relationship_type=type).graph
-            leaves[type] = [
-                self.get_entity(node)
-                for node in subgraph.nodes()
-                if subgraph.out_degree(node) == 0
+        successors, predecessors = self._get_adjacency()
+        return {
+            type: [
+                self.get_entity(entityId)
+                for entityId in predecessors[type]
+                if entityId not in successors[type]
             ]
-        return leaves
+            for type in predecessors
+        }
 
+    @rk.profiling.instrument("Assembly.get_subassemblies")
     def get_subassemblies(self) -> dict[str, Assembly]:
-        subassemblies = {}
-        for entity in self.get_entities().values():
-            if isinstance(entity, Assembly):
-                if entity is not self:
-                    if entity not in subassemblies.values():
-                        subassemblies[entity.entityId] = entity
-                        subassemblies.update(entity.get_subassemblies())
-        return subassemblies
+        return {entity["entityId"]: entity for entity in self.iter_subassemblies()}
 
+    @rk.profiling.instrument("Assembly.get_subentities")
     def get_subentities(self) -> dict[str, Entity]:
-        subentities = {}
-        for entity in self.get_entities().values():
-            if entity is not self:
-                if isinstance(entity, Assembly):
-                    if entity not in subentities.values():
-                        subentities[entity.entityId] = entity
-                        subentities.update(entity.get_subentities())
-                else:
-                    if isinstance(entity, Entity):
-                        if entity.entityId not in subentities:
-                            subentities[entity.entityId] = entity
-        return subentities
-
+        return {entity["entityId"]: entity for entity in self.iter_subentities()}
+
+    def iter_subassemblies(self) -> Iterator[Assembly]:
+        """
+        Yields the Assemblies nested (at any depth) in this Assembly, once each, depth-first.
+        """
+        return self._iter_nested(assemblies=True)
+
+    def iter_subentities(self) -> Iterator[Entity]:
+        """
+        Yields the Entities (including Assemblies) nested (at any depth) in this Assembly,
+        once each, depth-first.
+        """
+        return self._iter_nested(assemblies=False)
+
+    def _iter_nested(self, assemblies: bool) -> Iterator[Entity]:
+        visited = {self["entityId"]}
+        stack = [iter(list(self._get_index().values()))]
+        while stack:
+            entity = next(stack[-1], None)
+            if entity is None:
+                stack.pop()
+            elif not isinstance(entity, Entity) or entity["entityId"] in visited:
+                continue
+            elif isinstance(entity, Assembly):
+                visited.add(entity["entityId"])
+                yield entity
+                stack.append(iter(list(entity._get_index().values())))
+            elif not assemblies:
+                visited.add(entity["entityId"])
+                yield entity
+
+    @rk.profiling.instrument("Assembly.aggregate")
     def aggregate(
         self,
         property: str,
@@ -605,32 +809,298 @@ class Assembly(Entity):
         relationship_type: str = None,
         function: Optional[Callable] = None,
         outgoing: bool = True,
+        subtotals: bool = False,
+        processes: int = 1,
     ):
+        """
+        Aggregates a property of each Entity in an arborescent Assembly, labelling
+        each Entity with the aggregation of the property over itself and its relatives.
+        Entities are visited once, in a bottom-up pass (reverse topological order),
+        accumulating each Entity's aggregation into its parent.
+
+        If no function is provided, the aggregation is the sum of the (non-null) property values.
+        Otherwise, the function is called with the `aggregation` (a dict of property values keyed
+        by (entityId, name) for the Entity and its relatives) and the `entity`.
+        If `subtotals` is True, the `aggregation` instead holds the Entity's own property value
+        and its immediate relatives' (already aggregated) results, so that, e.g.,
+        `Entity.aggregate_flows` combines each child's summed Stream rather than re-sampling
+        every descendant's Flows.
+
+        With more than one process, independent subtrees are aggregated concurrently in a
+        worker pool (the function and property values must be picklable), and the Entities
+        above them are then aggregated in this process.
+
+        Repeating an aggregation (to the same label, with the same arguments) on an unmodified
+        Assembly only recomputes the Entities whose property has since been assigned, and their
+        ancestors; labels are overwritten, so results do not accumulate.
+        To do so, each Entity's sum (or subtotal) is kept with the aggregation; the
+        aggregations of whole subtrees (with a function, but no subtotals) are not kept,
+        but gathered again from the property values of the unchanged subtrees.
+        """
+
+        entities = self._get_index()
+        arguments = (property, relationship_type, function, outgoing, subtotals)
+        state = self._aggregations.get(label)
+        if state is None or state["arguments"] != arguments:
+            state = self._get_aggregation(property, relationship_type, outgoing)
+            state["arguments"] = arguments
+            self._aggregations[label] = state
+            changed = state["order"]
+        else:
+            changed = list(state["dirty"])
+        state["dirty"].clear()
+        if len(changed) == 0:
+            return
+        relatives = state["relatives"]
+        retain = function is None or subtotals
+
+        # Changed Entities and their ancestors must be (re)aggregated:
+        stale = set()
+        for entityId in changed:
+            while entityId is not None and entityId not in stale:
+                stale.add(entityId)
+                entityId = state["parents"].get(entityId)
+
+        # The results of the unchanged relatives of the stale Entities:
+        settled = {
+            relative: (
+                state["results"][relative]
+                if retain
+                else self._gather(relative, relatives, property)
+            )
+            for entityId in stale
+            for relative in relatives.get(entityId, {})
+            if relative not in stale
+        }
+
+        # Subtrees below the trunk are independent, and can be aggregated concurrently:
+        trunk = []
+        frontier = [state["root"]]
+        if processes > 1:
+            while len(frontier) < processes:
+                expanded = []
+                for entityId in frontier:
+                    if len(relatives.get(entityId, {})) > 0 and entityId in stale:
+                        trunk.append(entityId)
+                        expanded.extend(relatives.get(entityId, {}))
+                    else:
+                        expanded.append(entityId)
+                if expanded == frontier:
+                    break
+                frontier = expanded
+
+        # Group the stale Entities below the trunk by subtree, in (depth-first) preorder:
+        subtrees = {subroot: [] for subroot in frontier if subroot in stale}
+        owners = {}
+        trunk_ids = set(trunk)
+        for entityId in (
+            state["order"]
+            if len(stale) == len(state["order"])
+            else sorted(stale, key=state["positions"].__getitem__)
+        ):
+            if entityId in trunk_ids:
+                continue
+            owner = (
+                entityId if entityId in subtrees else owners[state["parents"][entityId]]
+            )
+            owners[entityId] = owner
+            subtrees[owner].append(entityId)
 
+        args = []
+        for subtree in subtrees.values():
+            subtree.reverse()  # Relatives before the Entities they relate to
+            args.append(
+                (
+                    [entities[entityId] for entityId in subtree],
+                    {entityId: relatives.get(entityId, {}) for entityId in subtree},
+                    {
+                        relative: settled[relative]
+                        for entityId in subtree
+                        for relative in relatives.get(entityId, {})
+                        if relative not in stale
+                    },
+                    property,
+                    function,
+                    subtotals,
+                    retain,
+                )
+            )
+
+        if len(args) > 1:
+            with multiprocess.Pool(min(processes, len(args))) as pool:
+                aggregations = pool.map(Assembly._aggregate_from_args, args)
+        else:
+            aggregations = [Assembly._aggregate_from_args(arg) for arg in args]
+
+        if len(trunk) > 0:
+            results = {
+                relative: settled[relative]
+                for entityId in trunk
+                for relative in relatives.get(entityId, {})
+                if relative in settled
+            }
+            for aggregation in aggregations:
+                results.update(aggregation[0])
+            aggregations.append(
+                Assembly._aggregate_from_args(
+                    (
+                        [entities[entityId] for entityId in reversed(trunk)],
+                        {entityId: relatives.get(entityId, {}) for entityId in trunk},
+                        results,
+                        property,
+                        function,
+                        subtotals,
+                        retain,
+                    )
+                )
+            )
+
+        for results, outputs in aggregations:
+            if retain:
+                state["results"].update(results)
+            for entityId, output in outputs.items():
+                entities[entityId][label] = output
+
+    def _get_aggregation(
+        self,
+        property: str,
+        relationship_type: Optional[str],
+        outgoing: bool,
+    ) -> dict:
+        """
+        Returns the (initial) state of an aggregation: the tree's root, the index of
+        each Entity's relatives (as dicts of their entityIds, shared with the Assembly's
+        adjacency index), each Entity's parent, its position in a depth-first (pre-order) traversal, and
+        the set of Entities that have changed since they were last aggregated
+        (which each Entity is registered to).
+        """
         if relationship_type is not None:
             assembly = self.filter_by_type(relationship_type=relationship_type)
         else:
             assembly = self
 
-        if nx.is_arborescence(assembly.graph):
-            root = next(nx.topological_sort(assembly.graph))
-        else:
+        if not assembly._is_arborescence():
             raise NotImplementedError(
                 "Aggregation is only implemented for arborescent graphs."
             )
 
-        self.get_entity(root)._aggregate(
-            assembly=assembly,
-            property=property,
-            label=label,
-            relationship_type=relationship_type,
-            function=function,
-            outgoing=outgoing,
+        successors, predecessors = self._get_adjacency()
+        types = list(successors) if relationship_type is None else [relationship_type]
+        index = successors if outgoing else predecessors
+        if len(types) == 1:
+            relatives = index.get(types[0], {})
+        else:
+            relatives = {}
+            for type in types:
+                for entityId, targets in index.get(type, {}).items():
+                    relatives.setdefault(entityId, {}).update(targets)
+        nodes = assembly._get_index()
+        root = next(
+            entityId
+            for entityId in nodes
+            if not any(entityId in predecessors.get(type, {}) for type in types)
         )
 
+        order = []
+        stack = [root]
+        while stack:
+            entityId = stack.pop()
+            order.append(entityId)
+            stack.extend(reversed(relatives.get(entityId, {})))
+
+        entities = self._get_index()
+        dirty = _Dirty()
+        watcher = weakref.ref(dirty)
+        for entityId in order:
+            entities[entityId]._watch(property, watcher)
+
+        return {
+            "root": root,
+            "order": order,
+            "positions": {entityId: i for (i, entityId) in enumerate(order)},
+            "relatives": relatives,
+            "parents": {
+                relative: entityId
+                for (entityId, targets) in relatives.items()
+                for relative in targets
+            },
+            "dirty": dirty,
+            "results": {},
+        }
+
+    def _gather(
+        self,
+        entityId: str,
+        relatives: dict[str, dict[str, None]],
+        property: str,
+    ) -> dict[tuple[str, str], Any]:
+        """
+        Returns the aggregation of an (unchanged) subtree: the property values of its
+        Entities keyed by (entityId, name), in (depth-first) preorder
+        """
+        entities = self._get_index()
+        aggregation = {}
+        stack = [entityId]
+        while stack:
+            entity = entities[stack.pop()]
+            aggregation[(entity["entityId"], entity["name"])] = (
+                entity[property] if hasattr(entity, property) else None
+            )
+            stack.extend(reversed(relatives.get(entity["entityId"], {})))
+        return aggregation
+
+    @staticmethod
+    def _aggregate_from_args(
+        args: tuple[
+            List[Entity],
+            dict[str, dict[str, None]],
+            dict[str, Any],
+            str,
+            Optional[Callable],
+            bool,
+            bool,
+        ],
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        """
+        Aggregates a list of Entities, each after its relatives, given the results of any
+        relatives not in the list. Returns the results (to be aggregated into the Entities'
+        parents) and outputs (to label the Entities with) by entityId.
+        Unless `retain` is True, relatives' results are discarded once aggregated into
+        their parent, and only the results of Entities without a parent in the list are
+        returned.
+        """
+        entities, relatives, results, property, function, subtotals, retain = args
+        results = dict(results)
+        outputs = {}
+        for entity in entities:
+            entityId = entity["entityId"]
+            value = entity[property] if hasattr(entity, property) else None
+
+            if function is None:
+                output = sum(
+                    (results[relative] for relative in relatives.get(entityId, {})),
+                    start=value if value else 0,
+                )
+                results[entityId] = output
+            else:
+                aggregation = {(entityId, entity["name"]): value}
+                for relative in relatives.get(entityId, {}):
+                    aggregation.update(
+                        results[relative] if retain else results.pop(relative)
+                    )
+                output = function(aggregation=aggregation, entity=entity)
+                results[entityId] = (
+                    {(entityId, entity["name"]): output} if subtotals else aggregation
+                )
+            outputs[entityId] = output
+
+        return {
+            entityId: results[entityId] for entityId in outputs if entityId in results
+        }, outputs
+
     def to_dict(self, properties: Optional[List[str]] = None) -> dict[str, dict]:
         arborecence = False
-        if nx.is_arborescence(self.graph):
+        if self._is_arborescence():
             arborecence = True
         results = {}
         for entity in self.get_entities().values():
@@ -643,29 +1113,47 @@ class Assembly(Entity):
         return results
 
     def to_DataFrame(self, properties: Optional[List[str]] = None) -> pd.DataFrame:
-        return pd.DataFrame.from_dict(
-            self.to_dict(properties=properties), orient="index"
-        )
+        """
+        Tabulates the Entities' properties (by default, all their members), as with
+        `to_dict`, building each column in a single pass over the Entities.
+        """
+        entities = self._get_index()
+        if properties is None:
+            properties = list(
+                dict.fromkeys(
+                    key
+                    for entity in entities.values()
+                    for key in entity.get_member_names()
+                    if key not in _unlisted
+                )
+            )
+        columns = {
+            key: [entity.__dict__.get(key) for entity in entities.values()]
+            for key in properties
+        }
+
+        if self._is_arborescence():
+            labels = self._get_labels()
+            columns["parent"] = [labels[entityId]["parent"] for entityId in entities]
+            columns["children"] = [
+                self._get_relatives(entityId=entityId) for entityId in entities
+            ]
+        else:
+            columns["relationships"] = [
+                entity.get_relationships(assembly=self) for entity in entities.values()
+            ]
+
+        return pd.DataFrame(columns, index=list(entities.keys()))
 
     def _get_trunk_index(self, entityId: str) -> int:
-        root = list(self.get_roots().values())[0][0]
-        trunks = root.get_relatives(assembly=self)
-        entity = self.get_entity(entityId)
-        ancestors = entity.get_ancestors(assembly=self)
-        for i in range(len(trunks)):
-            if trunks[i]["entityId"] == entityId:
-                return i
-            elif trunks[i]["entityId"] in ancestors:
-                return i
-            # else:
-            #     return -1
+        return self._get_labels()[entityId]["trunk"]
 
     def sunburst(self, property: str):
-        if not nx.is_arborescence(self.graph):
+        if not self._is_arborescence():
             raise NotImplementedError(
                 "Sunburst is only implemented for arborescent (hierarchical) graphs."
             )
-        df = self.to_DataFrame()
+        df = self.to_DataFrame(properties=["entityId", "name", property])
 
         df["property_total"] = [
             (
@@ -681,14 +1169,15 @@ class Assembly(Entity):
         if (df["property_total"].values <= 0).all():
             df["property_total"] = df["property_total"].abs()
 
-        df["trunk_idx"] = df["entityId"].apply(
-            lambda entityId: self._get_trunk_index(entityId)
-        )
+        labels = self._get_labels()
+        df["trunk_idx"] = [labels[entityId]["trunk"] for entityId in df["entityId"]]
         df["color_norm"] = (df["property_total"] - df["property_total"].min()) / (
             df["property_total"].max() - df["property_total"].min()
         )
         df["color"] = df["color_norm"] + (df["trunk_idx"] + 2)
 
+        import plotly.graph_objects as go
+
         trace = go.Sunburst(
             ids=df["entityId"],
             labels=df["name"],
@@ -708,11 +1197,11 @@ class Assembly(Entity):
         return trace
 
     def treemap(self, property, title: str = None):
-        if not nx.is_arborescence(self.graph):
+        if not self._is_arborescence():
             raise NotImplementedError(
                 "Sunburst is only implemented for arborescent (hierarchical) graphs."
             )
-        df = self.to_DataFrame()
+        df = self.to_DataFrame(properties=["entityId", "name", property])
 
         df["property_total"] = [
             (
@@ -728,14 +1217,15 @@ class Assembly(Entity):
         if (df["property_total"].values <= 0).all():
             df["property_total"] = df["property_total"].abs()
 
-        df["trunk_idx"] = df["entityId"].apply(
-            lambda entityId: self._get_trunk_index(entityId)
-        )
+        labels = self._get_labels()
+        df["trunk_idx"] = [labels[entityId]["trunk"] for entityId in df["entityId"]]
         df["color_norm"] = (df["property_total"] - df["property_total"].min()) / (
             df["property_total"].max() - df["property_total"].min()
         )
         df["color"] = df["color_norm"] + (df["trunk_idx"] + 2)
 
+        import plotly.graph_objects as go
+
         trace = go.Treemap(
             ids=df["entityId"],
             labels=df["name"],
@@ -762,6 +1252,9 @@ class Assembly(Entity):
         hierarchical_layout: bool = True,
         notebook: bool = True,
     ) -> network.Network:
+        import matplotlib as mpl
+        from pyvis import network
+
         nt = network.Network(
             directed=True,
             filter_menu=True,
@@ -840,4 +1333,287 @@ class Assembly(Entity):
         # print(filename)
         nt.show(name=filename, local=False, notebook=notebook)
         if notebook & display:
+            from IPython.display import IFrame
+
             return IFrame(self["name"] + ".html", width=width, height=height)
+
+
+class CompactAssembly:
+    """
+    A compact, array-backed representation of an Assembly, for large graphs:
+    Entities are identified by integer ids (their position in `entityIds`), the
+    relationships of each type are held as CSR (compressed sparse row) adjacency arrays,
+    and Entity properties are held as typed columns (float arrays where numeric).
+    Traversals return entityIds, and (numeric) aggregation is vectorised.
+
+    Its API is a narrower, array-based counterpart of Assembly's, as it holds no Entities:
+    - `get_roots` and `get_leaves` return arrays of entityIds (by relationship type),
+      rather than lists of Entities;
+    - `get_relatives` and `get_ancestors` take the entityId to start from (rather than
+      being called on an Entity, with its Assembly) and return entityIds;
+    - `aggregate` accumulates a numeric column with a binary NumPy ufunc (e.g. np.add or
+      np.maximum), rather than calling a function on each Entity's aggregation, and does
+      not support subtotals or multiprocessing.
+    Use an Assembly (e.g. from `Assembly.from_graph`) where Entities or arbitrary
+    aggregation functions are needed.
+    """
+
+    def __init__(
+        self,
+        entityIds: List[str],
+        relationships: Dict[str, tuple[np.ndarray, np.ndarray]],
+        properties: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        :param entityIds: The entityIds of the Entities, by integer id
+        :param relationships: The (source, target) integer ids of each relationship, by type
+        :param properties: Columns of property values, by property name
+        """
+        self.entityIds = np.asarray(entityIds, dtype=object)
+        self.index = {entityId: i for (i, entityId) in enumerate(entityIds)}
+        """The integer id of each Entity, by entityId"""
+        self.properties = {
+            name: CompactAssembly._to_column(values)
+            for (name, values) in ({} if properties is None else properties).items()
+        }
+        """Columns of Entity property values, by property name"""
+
+        size = len(self.entityIds)
+        self._outgoing = {}
+        self._incoming = {}
+        for type, (sources, targets) in relationships.items():
+            sources = np.asarray(sources, dtype=np.int64)
+            targets = np.asarray(targets, dtype=np.int64)
+            self._outgoing[type] = CompactAssembly._to_csr(sources, targets, size)
+            self._incoming[type] = CompactAssembly._to_csr(targets, sources, size)
+
+    @classmethod
+    def from_assembly(
+        cls,
+        assembly: Assembly,
+        properties: Optional[List[str]] = None,
+    ) -> CompactAssembly:
+        """
+        Converts an Assembly, with the specified properties of its Entities
+        (by default, all their members).
+        """
+        entities = assembly.get_entities()
+        entityIds = list(entities.keys())
+        index = {entityId: i for (i, entityId) in enumerate(entityIds)}
+
+        edges = {}
+        for source, target, type in assembly.graph.edges(keys=True):
+            sources, targets = edges.setdefault(type, ([], []))
+            sources.append(index[source])
+            targets.append(index[target])
+
+        if properties is None:
+            properties = list(
+                dict.fromkeys(
+                    name
+                    for entity in entities.values()
+                    for name in entity.get_member_names()
+                    if name not in _unlisted
+                )
+            )
+
+        return cls(
+            entityIds=entityIds,
+            relationships=edges,
+            properties={
+                name: [entity.try_get_attribute(name) for entity in entities.values()]
+                for name in properties
+            },
+        )
+
+    @staticmethod
+    def _to_column(values) -> np.ndarray:
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            return values
+        values = list(values)
+        if all(
+            value is None
+            or (
+                isinstance(value, (int, float, np.number))
+                and not isinstance(value, bool)
+            )
+            for value in values
+        ):
+            return np.array(
+                [np.nan if value is None else value for value in values], dtype=float
+            )
+        column = np.empty(len(values), dtype=object)
+        column[:] = values
+        return column
+
+    @staticmethod
+    def _to_csr(
+        sources: np.ndarray, targets: np.ndarray, size: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=indptr[1:])
+        return indptr, targets[order]
+
+    @staticmethod
+    def _expand(csr: tuple[np.ndarray, np.ndarray], nodes: np.ndarray) -> np.ndarray:
+        """
+        Returns the concatenated rows of a CSR adjacency for the given nodes
+        """
+        indptr, indices = csr
+        counts = indptr[nodes + 1] - indptr[nodes]
+        offsets = np.repeat(indptr[nodes] - (np.cumsum(counts) - counts), counts)
+        return indices[offsets + np.arange(counts.sum())]
+
+    def _get_adjacency(
+        self, relationship_type: Optional[str] = None, outgoing: bool = True
+    ) -> tuple[np.ndarray, np.ndarray]:
+        adjacency = self._outgoing if outgoing else self._incoming
+        if relationship_type is not None:
+            return adjacency[relationship_type]
+        if None not in adjacency:
+            sources = np.concatenate(
+                [
+                    np.repeat(np.arange(len(self.entityIds)), np.diff(indptr))
+                    for (indptr, _) in self._outgoing.values()
+                ]
+                + [np.empty(0, dtype=np.int64)]
+            )
+            targets = np.concatenate(
+                [indices for (_, indices) in self._outgoing.values()]
+                + [np.empty(0, dtype=np.int64)]
+            )
+            size = len(self.entityIds)
+            self._outgoing[None] = CompactAssembly._to_csr(sources, targets, size)
+            self._incoming[None] = CompactAssembly._to_csr(targets, sources, size)
+        return adjacency[None]
+
+    def _types(self) -> List[str]:
+        return [type for type in self._outgoing if type is not None]
+
+    def get_roots(self) -> dict[str, np.ndarray]:
+        roots = {}
+        for type in self._types():
+            outdegrees = np.diff(self._outgoing[type][0])
+            indegrees = np.diff(self._incoming[type][0])
+            roots[type] = self.entityIds[(outdegrees > 0) & (indegrees == 0)]
+        return roots
+
+    def get_leaves(self) -> dict[str, np.ndarray]:
+        leaves = {}
+        for type in self._types():
+            outdegrees = np.diff(self._outgoing[type][0])
+            indegrees = np.diff(self._incoming[type][0])
+            leaves[type] = self.entityIds[(indegrees > 0) & (outdegrees == 0)]
+        return leaves
+
+    def get_relatives(
+        self,
+        entityId: str,
+        relationship_type: Optional[str] = None,
+        outgoing: bool = True,
+    ) -> np.ndarray:
+        """
+        Returns the entityIds of an Entity's relatives (cf. `Entity.get_relatives`)
+        """
+        indptr, indices = self._get_adjacency(relationship_type, outgoing)
+        i = self.index[entityId]
+        return self.entityIds[indices[indptr[i] : indptr[i + 1]]]
+
+    def get_ancestors(
+        self, entityId: str, relationship_type: Optional[str] = None
+    ) -> List[str]:
+        """
+        Returns the entityIds of an Entity's ancestors, from its parent to the root
+        (cf. `Entity.get_ancestors`)
+        """
+        indptr, indices = self._get_adjacency(relationship_type, outgoing=False)
+        ancestors = []
+        i = self.index[entityId]
+        while indptr[i + 1] > indptr[i]:
+            if indptr[i + 1] - indptr[i] > 1 or len(ancestors) > len(self.entityIds):
+                raise Exception(
+                    "The Assembly is not a tree. Cannot calculate ancestors."
+                )
+            i = indices[indptr[i]]
+            ancestors.append(self.entityIds[i])
+        return ancestors
+
+    def _get_levels(
+        self, relationship_type: Optional[str] = None
+    ) -> tuple[List[np.ndarray], np.ndarray]:
+        """
+        Returns the integer ids of an arborescent graph's Entities by depth (from its root),
+        and the integer id of each Entity's parent (-1 for the root and any Entity
+        outside the graph).
+        """
+        outgoing = self._get_adjacency(relationship_type, outgoing=True)
+        indegrees = np.diff(self._get_adjacency(relationship_type, outgoing=False)[0])
+        outdegrees = np.diff(outgoing[0])
+        if relationship_type is None:
+            members = np.ones(len(self.entityIds), dtype=bool)
+        else:
+            members = (indegrees > 0) | (outdegrees > 0)
+        roots = np.flatnonzero(members & (indegrees == 0))
+        if len(roots) != 1 or (indegrees > 1).any():
+            raise NotImplementedError(
+                "Aggregation is only implemented for arborescent graphs."
+            )
+
+        parents = np.full(len(self.entityIds), -1, dtype=np.int64)
+        levels = [roots]
+        count = 1
+        while True:
+            frontier = levels[-1]
+            children = CompactAssembly._expand(outgoing, frontier)
+            if len(children) == 0:
+                break
+            parents[children] = np.repeat(
+                frontier, outgoing[0][frontier + 1] - outgoing[0][frontier]
+            )
+            levels.append(children)
+            count += len(children)
+            if count > members.sum():
+                break
+        if count != members.sum():
+            raise NotImplementedError(
+                "Aggregation is only implemented for arborescent graphs."
+            )
+        return levels, parents
+
+    @rk.profiling.instrument("CompactAssembly.aggregate")
+    def aggregate(
+        self,
+        property: str,
+        label: str,
+        relationship_type: Optional[str] = None,
+        function: np.ufunc = np.add,
+    ):
+        """
+        Aggregates a (numeric) property of each Entity in an arborescent graph, labelling
+        each Entity with the accumulation (by default, the sum) of the property over itself
+        and its descendants. Entities are aggregated a level at a time, from the deepest.
+        Null values are treated as zero, and Entities outside the graph are labelled null.
+        Unlike `Assembly.aggregate`, the function must be a binary NumPy ufunc (applied
+        with `ufunc.at`), not a function of each Entity's aggregation.
+        """
+        if not isinstance(function, np.ufunc):
+            raise TypeError(
+                "Error: CompactAssembly aggregation requires a NumPy ufunc (e.g. np.add). "
+                "Use Assembly.aggregate for other functions."
+            )
+        levels, parents = self._get_levels(relationship_type)
+        values = np.nan_to_num(np.asarray(self.properties[property], dtype=float))
+        results = np.full(len(self.entityIds), np.nan)
+        members = np.concatenate(levels)
+        results[members] = values[members]
+        for level in reversed(levels[1:]):
+            function.at(results, parents[level], results[level])
+        self.properties[label] = results
+
+    def to_DataFrame(self, properties: Optional[List[str]] = None) -> pd.DataFrame:
+        properties = list(self.properties.keys()) if properties is None else properties
+        return pd.DataFrame(
+            {name: self.properties[name] for name in properties},
+            index=pd.Index(self.entityIds, name="entityId"),
+        )
@@ -1,5 +1,8 @@
 from abc import abstractmethod
-from typing import Callable, List, Any, Dict
+from typing import Callable, List, Any, Dict, Union
+
+import numpy as np
+import pandas as pd
 
 import rangekeeper as rk
 
@@ -18,3 +21,120 @@ class Policy:
         state, model = args  # This is done to assist multiprocessing
         decision = self.condition(state)
         return self.action(model, decision)
+
+
+def to_states(
+        states: Union[rk.flux.Flow, List[rk.flux.Flow], pd.DataFrame, np.ndarray]) -> np.ndarray:
+    """
+    Stacks the movements of a batch of (equal-length) Flows into a
+    (scenarios × periods) state matrix. DataFrames and arrays are passed through
+    (as 2-dimensional arrays).
+    """
+    if isinstance(states, rk.flux.Flow):
+        states = [states]
+    if isinstance(states, list):
+        lengths = set(flow.movements.size for flow in states)
+        if len(lengths) > 1:
+            raise ValueError(
+                "States must have the same number of periods. Lengths: {0}".format(sorted(lengths)))
+        states = np.vstack([flow.movements.to_numpy(dtype=float) for flow in states])
+    return np.atleast_2d(np.asarray(states))
+
+
+class BatchPolicy(Policy):
+    """
+    A Policy evaluated over a batch of scenarios at once.
+    The condition receives a (scenarios × periods) state matrix and returns a
+    boolean decision matrix of the same shape; the action receives the batch of
+    models (e.g. a matrix of cash flows, or a list of models) and the decision matrix.
+    """
+    def __init__(
+            self,
+            condition: Callable[[np.ndarray], np.ndarray],
+            action: Callable[[Any, np.ndarray], Any]):
+        super().__init__(condition=condition, action=action)
+
+    def decide(
+            self,
+            states: Union[rk.flux.Flow, List[rk.flux.Flow], pd.DataFrame, np.ndarray]) -> np.ndarray:
+        states = to_states(states)
+        decisions = np.asarray(self.condition(states), dtype=bool)
+        if decisions.shape != states.shape:
+            raise ValueError(
+                "Decisions (outcomes of condition tests) must match the shape of the states. "
+                "Decisions: {0}; States: {1}".format(decisions.shape, states.shape))
+        return decisions
+
+    def execute(
+            self,
+            args: tuple) -> object:
+        states, models = args  # This is done to assist multiprocessing (e.g. over chunks of scenarios)
+        decisions = self.decide(states)
+        return self.action(models, decisions)
+
+    def exercise(
+            self,
+            states: Union[rk.flux.Flow, List[rk.flux.Flow], pd.DataFrame, np.ndarray],
+            earliest: int = 0) -> 'Exercise':
+        """
+        Exercises the policy at the first period (from `earliest`) in which its
+        condition holds, for each scenario.
+        """
+        return Exercise(decisions=self.decide(states), earliest=earliest)
+
+
+class Exercise:
+    """
+    The first exercise of a decision in each scenario of a (scenarios × periods)
+    decision matrix, ignoring any decisions before period `earliest`.
+    Scenarios in which the decision is never taken have an index of -1.
+    """
+    def __init__(
+            self,
+            decisions: np.ndarray,
+            earliest: int = 0):
+        decisions = np.atleast_2d(np.asarray(decisions, dtype=bool))
+        if earliest > 0:
+            decisions = decisions.copy()
+            decisions[:, :earliest] = False
+        self.periods = decisions.shape[1]
+        self.exercised = decisions.any(axis=1)
+        self.indices = np.where(self.exercised, decisions.argmax(axis=1), -1)
+
+        self.mask = np.zeros(decisions.shape, dtype=bool)
+        scenarios = np.flatnonzero(self.exercised)
+        self.mask[scenarios, self.indices[scenarios]] = True
+
+    def truncate(
+            self,
+            cashflows: Union[List[rk.flux.Flow], pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        Zeroes each scenario's cash flows after its exercise period
+        (unexercised scenarios are left whole).
+        """
+        cashflows = to_states(cashflows)
+        if cashflows.shape != self.mask.shape:
+            raise ValueError(
+                "Cash flows must match the shape of the decisions. "
+                "Cash flows: {0}; Decisions: {1}".format(cashflows.shape, self.mask.shape))
+        ends = np.where(self.exercised, self.indices, self.periods - 1)
+        return np.where(np.arange(self.periods) <= ends[:, np.newaxis], cashflows, 0.)
+
+    def select(
+            self,
+            values: Union[List[rk.flux.Flow], pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """
+        Returns each scenario's values in its exercise period only (e.g. sale proceeds)
+        """
+        return np.where(self.mask, to_states(values), 0.)
+
+
+def first_exercise(
+        states: Union[rk.flux.Flow, List[rk.flux.Flow], pd.DataFrame, np.ndarray],
+        condition: Callable[[np.ndarray], np.ndarray],
+        earliest: int = 0) -> Exercise:
+    """
+    Finds, for all scenarios at once, the first period (from `earliest`) in which
+    a condition on a (scenarios × periods) state matrix holds.
+    """
+    return BatchPolicy(condition=condition, action=None).exercise(states=states, earliest=earliest)
@@ -0,0 +1,185 @@
+"""
+Opt-in instrumentation of rangekeeper's hot paths (Flow and Stream construction,
+resampling, projection evaluation, distribution sampling, Account evaluation and
+graph traversal). Instrumented calls are counted and timed only while a Profiler is
+active; otherwise they cost a single check of the active Profiler.
+
+Profilers are process-local: calls in worker processes (e.g. of a multiprocess.Pool)
+are not recorded.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+_active: Optional[Profiler] = None
+"""
+The active Profiler, if any
+"""
+
+
+def instrument(call: str) -> Callable:
+    """
+    Decorator that records calls of a function (as `call`) with the active Profiler.
+    Calls are attributed to the line item (name) of their first argument, if it has one
+    (e.g. the Flow being constructed or resampled).
+    """
+
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = _active
+            if profiler is None:
+                return function(*args, **kwargs)
+            start = profiler._enter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler._exit(call, _name(args), start)
+
+        return wrapper
+
+    return decorator
+
+
+def _name(args: tuple) -> Optional[str]:
+    if len(args) == 0:
+        return None
+    name = getattr(args[0], "__dict__", {}).get("name")
+    return name if isinstance(name, str) else None
+
+
+class Profiler:
+    def __init__(self, trace: bool = True):
+        """
+        Counts and times instrumented calls while active (between `start()` and
+        `stop()`, or within a `with` block). Each call's total (inclusive) and own
+        (exclusive of nested instrumented calls) time is accumulated per call and line
+        item; if `trace` is True, each call is also kept as an event for a Chrome trace.
+        """
+        self.trace = trace
+        self.counters: Dict[Tuple[str, Optional[str]], List[int]] = {}
+        self.events: List[tuple] = []
+        self._origin = time.perf_counter_ns()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._previous: Optional[Profiler] = None
+
+    def start(self) -> Profiler:
+        global _active
+        self._previous = _active
+        _active = self
+        return self
+
+    def stop(self):
+        global _active
+        _active = self._previous
+        self._previous = None
+
+    def __enter__(self) -> Profiler:
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _enter(self) -> int:
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0)  # Time spent in nested instrumented calls
+        return time.perf_counter_ns()
+
+    def _exit(self, call: str, name: Optional[str], start: int):
+        end = time.perf_counter_ns()
+        stack = self._local.stack
+        duration = end - start
+        own = duration - stack.pop()
+        if len(stack) > 0:
+            stack[-1] += duration
+        with self._lock:
+            counter = self.counters.setdefault((call, name), [0, 0, 0, 0])
+            counter[0] += 1
+            counter[1] += duration
+            counter[2] += own
+            counter[3] = max(counter[3], duration)
+            if self.trace:
+                self.events.append((call, name, start, duration, threading.get_ident()))
+
+    def report(self) -> pd.DataFrame:
+        """
+        Returns the count and times (in seconds) of instrumented calls, per call and
+        line item, in descending order of own time
+        """
+        report = pd.DataFrame(
+            data=[
+                (
+                    call,
+                    name,
+                    count,
+                    total / 1e9,
+                    own / 1e9,
+                    total / count / 1e9,
+                    peak / 1e9,
+                )
+                for ((call, name), (count, total, own, peak)) in self.counters.items()
+            ],
+            columns=["call", "name", "count", "total", "own", "mean", "max"],
+        )
+        return report.sort_values(by="own", ascending=False, ignore_index=True)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Returns the count and times (in seconds) of instrumented calls, per call
+        """
+        report = self.report()
+        summary = report.groupby("call").agg(
+            count=("count", "sum"),
+            total=("total", "sum"),
+            own=("own", "sum"),
+            max=("max", "max"),
+        )
+        summary["mean"] = summary["total"] / summary["count"]
+        return summary.sort_values(by="own", ascending=False)
+
+    def to_chrome_trace(self, path: Optional[Union[str, os.PathLike]] = None) -> dict:
+        """
+        Returns the recorded calls in the Chrome Trace Event format (viewable in
+        chrome://tracing or Perfetto), and writes them to `path` as JSON if given
+        """
+        if not self.trace:
+            raise ValueError("Error: Profiler was not set to trace calls")
+        pid = os.getpid()
+        trace = {
+            "traceEvents": [
+                {
+                    "name": call if name is None else "{0}: {1}".format(call, name),
+                    "cat": call,
+                    "ph": "X",
+                    "ts": (start - self._origin) / 1e3,
+                    "dur": duration / 1e3,
+                    "pid": pid,
+                    "tid": thread,
+                    "args": {"name": name},
+                }
+                for (call, name, start, duration, thread) in self.events
+            ],
+            "displayTimeUnit": "ms",
+        }
+        if path is not None:
+            with open(path, "w") as file:
+                json.dump(trace, file)
+        return trace
+
+
+def profile(trace: bool = True) -> Profiler:
+    """
+    Returns a new Profiler, to be used as a context manager, e.g.:
+    `with rk.profiling.profile() as profiler: model = Model(params)`
+    and then `profiler.report()` to see which of the model's line items dominate
+    """
+    return Profiler(trace=trace)
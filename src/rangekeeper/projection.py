@@ -84,6 +84,7 @@ class Extrapolation(Projection):
         else:
             self.padding = padding
 
+    @rk.profiling.instrument('Extrapolation.terms')
     def terms(self) -> pd.Series:
         terms = self.form.terms(
             sequence=rk.duration.Sequence.to_range_index(sequence=self.sequence))
@@ -153,6 +154,7 @@ class Distribution(Projection):
         max = range_index[-1]
         return [index / max for index in range_index]
 
+    @rk.profiling.instrument('Distribution.interval_density')
     def interval_density(self) -> pd.Series:
         densities = self.form.interval_density(parameters=self._parameters)
         data = np.concatenate((self._left_padding, densities, self._right_padding))
@@ -165,6 +167,7 @@ class Distribution(Projection):
                     frequency=rk.duration.Type.from_value(self.sequence.freqstr),
                     bound=self.bounds[1].to_timestamp())))
 
+    @rk.profiling.instrument('Distribution.cumulative_density')
     def cumulative_density(self) -> [float]:
         densities = self.form.cumulative_density(parameters=self._parameters)
         data = np.concatenate((self._left_padding, densities, self._right_padding))
@@ -0,0 +1,301 @@
+"""
+Chunked, streaming Monte Carlo simulation. Scenarios are generated and evaluated in
+chunks, and each chunk's results are folded into online statistics (moments,
+quantiles and histograms) and then discarded, so memory use does not grow with the
+number of scenarios.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import multiprocess
+import numpy as np
+from numba import jit
+
+
+class Moments:
+    """
+    Running count, mean, variance and extrema, merged chunk by chunk
+    (per Chan et al.'s parallel variance algorithm)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        count = self.count + values.size
+        mean = values.mean()
+        delta = mean - self.mean
+        squares = ((values - mean) ** 2).sum()
+        self._m2 += squares + delta**2 * self.count * values.size / count
+        self.mean += delta * values.size / count
+        self.count = count
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.count > 1 else np.nan
+
+
+@jit(nopython=True)
+def _p2(
+    values: np.ndarray,
+    heights: np.ndarray,
+    positions: np.ndarray,
+    desired: np.ndarray,
+    increments: np.ndarray,
+):
+    for x in values:
+        if x < heights[0]:
+            heights[0] = x
+            k = 0
+        elif x >= heights[4]:
+            heights[4] = x
+            k = 3
+        else:
+            k = 0
+            while k < 3 and x >= heights[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            desired[i] += increments[i]
+
+        for i in range(1, 4):
+            d = desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (
+                d <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                d = 1.0 if d > 0 else -1.0
+                # Piecewise-parabolic prediction:
+                height = heights[i] + d / (positions[i + 1] - positions[i - 1]) * (
+                    (positions[i] - positions[i - 1] + d)
+                    * (heights[i + 1] - heights[i])
+                    / (positions[i + 1] - positions[i])
+                    + (positions[i + 1] - positions[i] - d)
+                    * (heights[i] - heights[i - 1])
+                    / (positions[i] - positions[i - 1])
+                )
+                if not heights[i - 1] < height < heights[i + 1]:
+                    # Linear prediction:
+                    j = i + int(d)
+                    height = heights[i] + d * (heights[j] - heights[i]) / (
+                        positions[j] - positions[i]
+                    )
+                heights[i] = height
+                positions[i] += d
+
+
+class Quantile:
+    """
+    A running estimate of a quantile, in constant memory, using the P² algorithm
+    (Jain & Chlamtac, 1985)
+    """
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError("Error: Quantile must be between 0 and 1 exclusive")
+        self.p = p
+        self.count = 0
+        self._initial = []
+        self._heights = np.zeros(5)
+        self._positions = np.arange(5, dtype=float)
+        self._desired = np.array([0, 2 * p, 4 * p, 2 + 2 * p, 4])
+        self._increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        self.count += values.size
+        if len(self._initial) < 5:
+            needed = 5 - len(self._initial)
+            self._initial.extend(values[:needed])
+            values = values[needed:]
+            if len(self._initial) < 5:
+                return
+            self._heights[:] = np.sort(self._initial)
+        _p2(values, self._heights, self._positions, self._desired, self._increments)
+
+    @property
+    def value(self) -> float:
+        if self.count == 0:
+            return np.nan
+        elif self.count < 5:
+            return float(np.quantile(self._initial, self.p))
+        return float(self._heights[2])
+
+
+class Histogram:
+    """
+    Running counts of values in fixed bins. If no range is given, the bins span the
+    values of the first update; later values outside them are counted as under- or
+    overflows.
+    """
+
+    def __init__(self, bins: int = 50, range: Optional[Tuple[float, float]] = None):
+        self.bins = bins
+        self.edges = (
+            None if range is None else np.linspace(range[0], range[1], bins + 1)
+        )
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+        if self.edges is None:
+            self.edges = np.histogram_bin_edges(values, bins=self.bins)
+        self.underflow += int((values < self.edges[0]).sum())
+        self.overflow += int((values > self.edges[-1]).sum())
+        self.counts += np.histogram(values, bins=self.edges)[0]
+
+
+class Statistics:
+    """
+    Online statistics of a metric (e.g. NPV or IRR). Non-finite values (e.g. IRRs
+    that could not be solved) are counted, but otherwise excluded.
+    """
+
+    def __init__(
+        self,
+        quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95),
+        bins: int = 50,
+        range: Optional[Tuple[float, float]] = None,
+    ):
+        self.moments = Moments()
+        self.quantiles = {p: Quantile(p) for p in quantiles}
+        self.histogram = Histogram(bins=bins, range=range)
+        self.invalid = 0
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float).ravel()
+        valid = np.isfinite(values)
+        self.invalid += int((~valid).sum())
+        values = values[valid]
+        self.moments.update(values)
+        for quantile in self.quantiles.values():
+            quantile.update(values)
+        self.histogram.update(values)
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    @property
+    def mean(self) -> float:
+        return self.moments.mean if self.count > 0 else np.nan
+
+    @property
+    def std(self) -> float:
+        return self.moments.std
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "invalid": self.invalid,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.moments.min,
+            "max": self.moments.max,
+            **{
+                "p{0:g}".format(p * 100): quantile.value
+                for (p, quantile) in self.quantiles.items()
+            },
+        }
+
+
+class Simulation:
+    def __init__(
+        self,
+        generate: Callable[[int, int, np.random.Generator], Any],
+        evaluate: Callable[[Any], Dict[str, np.ndarray]],
+        seed: Optional[int] = None,
+        quantiles: Sequence[float] = (0.05, 0.25, 0.5, 0.75, 0.95),
+        bins: int = 50,
+        ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        """
+        A Monte Carlo simulation that generates scenarios in chunks (with
+        `generate(start, stop, generator)`, e.g. Markets or Scenarios), evaluates
+        each chunk with a model (`evaluate(chunk)`, returning an array of each
+        metric's values per scenario), and folds the results into online Statistics.
+
+        Each chunk is given its own random Generator, spawned from the seed by the
+        chunk's position, so results are reproducible regardless of the number of
+        processes.
+        """
+        self.generate = generate
+        self.evaluate = evaluate
+        self.seed = np.random.SeedSequence(seed)
+        self.quantiles = quantiles
+        self.bins = bins
+        self.ranges = {} if ranges is None else ranges
+        self.statistics: Dict[str, Statistics] = {}
+        self.count = 0
+
+    @staticmethod
+    def _from_args(args: tuple) -> Dict[str, np.ndarray]:
+        generate, evaluate, entropy, start, stop = (
+            args  # This is done to assist multiprocessing
+        )
+        generator = np.random.default_rng(
+            np.random.SeedSequence(entropy, spawn_key=(start,))
+        )
+        return evaluate(generate(start, stop, generator))
+
+    def _fold(self, results: Dict[str, np.ndarray]):
+        for metric, values in results.items():
+            if metric not in self.statistics:
+                self.statistics[metric] = Statistics(
+                    quantiles=self.quantiles,
+                    bins=self.bins,
+                    range=self.ranges.get(metric),
+                )
+            self.statistics[metric].update(values)
+
+    def run(
+        self,
+        count: int,
+        chunksize: int = 1000,
+        processes: int = 1,
+    ) -> Dict[str, Statistics]:
+        """
+        Runs (a further) `count` scenarios, in chunks of `chunksize`. If `processes`
+        is greater than 1, chunks are generated and evaluated in a pool of worker
+        processes, and only their results are returned to be folded (a single chunk,
+        or none, is run in this process).
+        """
+        args = [
+            (
+                self.generate,
+                self.evaluate,
+                self.seed.entropy,
+                start,
+                min(start + chunksize, self.count + count),
+            )
+            for start in range(self.count, self.count + count, chunksize)
+        ]
+        if processes > 1 and len(args) > 1:
+            with multiprocess.Pool(min(processes, len(args))) as pool:
+                for results in pool.imap(Simulation._from_args, args):
+                    self._fold(results)
+        else:
+            for arg in args:
+                self._fold(Simulation._from_args(arg))
+        self.count += count
+        return self.statistics
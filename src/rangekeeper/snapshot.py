@@ -0,0 +1,308 @@
+"""
+Binary snapshots of an Assembly: its graph structure and its Entities' properties,
+saved as a directory of NumPy (.npy) arrays (that can be memory-mapped on loading),
+alongside a JSON description. Numeric and string properties are stored as typed columns,
+Flows as shared date indices and contiguous value arrays, and Streams as references to
+their Flows. Any other property values are pickled.
+The currencies of Flows' units are recorded, and registered (if need be) on loading,
+so that snapshots can be loaded in a fresh (e.g. worker) process.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+from typing import Any, List, Union
+
+import numpy as np
+import pandas as pd
+
+import rangekeeper as rk
+
+_ROOT, _ENTITY, _ASSEMBLY = 0, 1, 2
+_FLOW, _STREAM = 0, 1
+
+
+class _Fluxes:
+    """
+    Collects the Flows (and Streams) of a snapshot, sharing identical date indices
+    """
+
+    def __init__(self):
+        self.dates = []
+        self.date_indices = {}
+        self.values = []
+        self.flows = []
+        self.streams = []
+        self.kinds = []
+        self.refs = []
+        self.currencies = {}
+
+    def add(self, flux: Union[rk.flux.Flow, rk.flux.Stream]) -> int:
+        self.kinds.append(_FLOW if isinstance(flux, rk.flux.Flow) else _STREAM)
+        if isinstance(flux, rk.flux.Flow):
+            self.refs.append(self._add_flow(flux))
+        else:
+            self.streams.append(
+                {
+                    "name": flux.name,
+                    "frequency": flux.frequency.name,
+                    "flows": [self._add_flow(flow) for flow in flux.flows],
+                }
+            )
+            self.refs.append(len(self.streams) - 1)
+        return len(self.kinds) - 1
+
+    def _add_flow(self, flow: rk.flux.Flow) -> int:
+        dates = flow.movements.index.values.astype("datetime64[ns]").view(np.int64)
+        key = dates.tobytes()
+        if key not in self.date_indices:
+            self.date_indices[key] = len(self.dates)
+            self.dates.append(dates)
+        self.values.append(flow.movements.to_numpy(dtype=float))
+        for unit in flow.units._units:
+            if "[currency]" in rk.measure.Index.registry.get_dimensionality(unit):
+                self.currencies[unit] = None
+        self.flows.append(
+            {
+                "name": flow.name,
+                "units": str(flow.units),
+                "dates": self.date_indices[key],
+            }
+        )
+        return len(self.flows) - 1
+
+
+def _concatenate(arrays: List[np.ndarray], dtype) -> tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([len(array) for array in arrays], out=offsets[1:])
+    data = np.concatenate(arrays) if len(arrays) > 0 else np.empty(0)
+    return data.astype(dtype, copy=False), offsets
+
+
+def _kind(values: List[Any]) -> str:
+    present = [value for value in values if value is not None]
+    if all(
+        isinstance(value, (int, np.integer))
+        and not isinstance(value, bool)
+        and -(2**63) <= value < 2**63
+        for value in present
+    ):
+        return "int"
+    elif all(
+        isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+        for value in present
+    ):
+        return "float"
+    elif all(isinstance(value, str) for value in present):
+        return "str"
+    elif all(isinstance(value, (rk.flux.Flow, rk.flux.Stream)) for value in present):
+        return "flux"
+    else:
+        return "object"
+
+
+def save(assembly: rk.graph.Assembly, path: Union[str, os.PathLike]):
+    """
+    Saves a snapshot of an Assembly (including any nested Assemblies) to a directory
+    """
+    os.makedirs(path, exist_ok=True)
+
+    entities = {assembly["entityId"]: assembly}
+    entities.update(assembly.get_entities())
+    for entity in assembly.iter_subentities():
+        entities.setdefault(entity["entityId"], entity)
+    index = {entityId: i for (i, entityId) in enumerate(entities)}
+    kinds = np.array(
+        [_ROOT]
+        + [
+            _ASSEMBLY if isinstance(entity, rk.graph.Assembly) else _ENTITY
+            for entity in list(entities.values())[1:]
+        ],
+        dtype=np.uint8,
+    )
+
+    # Structure:
+    types = {}
+    edges = []
+    for owner, member in entities.items():
+        if isinstance(member, rk.graph.Assembly):
+            for source, target, type in member.graph.edges(keys=True):
+                edges.append(
+                    (
+                        index[owner],
+                        index[source],
+                        index[target],
+                        types.setdefault(type, len(types)),
+                    )
+                )
+    edges = np.array(edges, dtype=np.int64).reshape(-1, 4)
+
+    # Properties:
+    names = list(
+        dict.fromkeys(
+            name
+            for entity in entities.values()
+            for name in entity.get_member_names()
+            if name not in rk.graph._unlisted
+        )
+    )
+    fluxes = _Fluxes()
+    objects = {}
+    columns = {}
+    arrays = {"kinds": kinds, "edges": edges}
+    for i, name in enumerate(names):
+        values = [entity.__dict__.get(name) for entity in entities.values()]
+        kind = _kind(values)
+        columns[name] = {"kind": kind, "file": "property{0}".format(i)}
+        arrays[columns[name]["file"] + ".present"] = np.array(
+            [name in entity.__dict__ for entity in entities.values()], dtype=bool
+        )
+        arrays[columns[name]["file"] + ".null"] = np.array(
+            [value is None for value in values], dtype=bool
+        )
+        if kind == "int":
+            column = np.array(
+                [0 if value is None else value for value in values], dtype=np.int64
+            )
+        elif kind == "float":
+            column = np.array(
+                [np.nan if value is None else value for value in values], dtype=float
+            )
+        elif kind == "str":
+            column = np.array(["" if value is None else value for value in values])
+        elif kind == "flux":
+            column = np.array(
+                [-1 if value is None else fluxes.add(value) for value in values],
+                dtype=np.int64,
+            )
+        else:
+            objects[name] = values
+            continue
+        arrays[columns[name]["file"]] = column
+
+    arrays["dates"], arrays["date_offsets"] = _concatenate(fluxes.dates, np.int64)
+    arrays["values"], arrays["value_offsets"] = _concatenate(fluxes.values, float)
+    arrays["flux_kinds"] = np.array(fluxes.kinds, dtype=np.uint8)
+    arrays["flux_refs"] = np.array(fluxes.refs, dtype=np.int64)
+    arrays["entityIds"] = np.array(list(entities.keys()))
+
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + ".npy"), array, allow_pickle=False)
+    with open(os.path.join(path, "objects.pkl"), "wb") as file:
+        pickle.dump(objects, file, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.join(path, "snapshot.json"), "w") as file:
+        json.dump(
+            {
+                "types": list(types.keys()),
+                "properties": columns,
+                "flows": fluxes.flows,
+                "streams": fluxes.streams,
+                "currencies": list(fluxes.currencies),
+            },
+            file,
+        )
+
+
+def load(
+    path: Union[str, os.PathLike],
+    mmap: bool = True,
+) -> rk.graph.Assembly:
+    """
+    Loads an Assembly from a snapshot. If `mmap` is True, arrays (including Flows'
+    movements) are memory-mapped (copy-on-write) rather than read into memory.
+    """
+    with open(os.path.join(path, "snapshot.json"), "r") as file:
+        description = json.load(file)
+    with open(os.path.join(path, "objects.pkl"), "rb") as file:
+        objects = pickle.load(file)
+
+    def read(name: str) -> np.ndarray:
+        return np.load(
+            os.path.join(path, name + ".npy"),
+            mmap_mode="c" if mmap else None,
+            allow_pickle=False,
+        )
+
+    entityIds = read("entityIds")
+    kinds = read("kinds")
+    entities = [
+        (
+            rk.graph.Assembly(entityId=str(entityId))
+            if kind in (_ROOT, _ASSEMBLY)
+            else rk.graph.Entity(entityId=str(entityId))
+        )
+        for (entityId, kind) in zip(entityIds, kinds)
+    ]
+
+    # Fluxes:
+    dates, date_offsets = read("dates"), read("date_offsets")
+    indices = [
+        pd.DatetimeIndex(dates[start:end].view("datetime64[ns]"), name="date")
+        for (start, end) in zip(date_offsets[:-1], date_offsets[1:])
+    ]
+    values, value_offsets = read("values"), read("value_offsets")
+    registry = rk.measure.Index.registry
+    for code in description["currencies"]:
+        if code not in registry:
+            rk.measure.register_currency(registry=registry, code=code)
+    flows = [
+        rk.flux.Flow(
+            movements=pd.Series(
+                data=values[value_offsets[i] : value_offsets[i + 1]],
+                index=indices[flow["dates"]],
+                copy=False,
+            ),
+            units=registry.Unit(flow["units"]),
+            name=flow["name"],
+        )
+        for (i, flow) in enumerate(description["flows"])
+    ]
+    streams = [
+        rk.flux.Stream(
+            name=stream["name"],
+            flows=[flows[i] for i in stream["flows"]],
+            frequency=rk.duration.Type[stream["frequency"]],
+        )
+        for stream in description["streams"]
+    ]
+    fluxes = [
+        flows[ref] if kind == _FLOW else streams[ref]
+        for (kind, ref) in zip(read("flux_kinds"), read("flux_refs"))
+    ]
+
+    # Properties:
+    for name, column in description["properties"].items():
+        present = read(column["file"] + ".present")
+        null = read(column["file"] + ".null")
+        if column["kind"] == "object":
+            values = objects[name]
+        else:
+            values = read(column["file"])
+        for i in np.flatnonzero(present):
+            if null[i]:
+                value = None
+            elif column["kind"] == "int":
+                value = int(values[i])
+            elif column["kind"] == "float":
+                value = float(values[i])
+            elif column["kind"] == "str":
+                value = str(values[i])
+            elif column["kind"] == "flux":
+                value = fluxes[values[i]]
+            else:
+                value = values[i]
+            entities[i][name] = value
+
+    # Structure:
+    types = description["types"]
+    relationships = {}
+    for owner, source, target, type in read("edges"):
+        relationships.setdefault(owner, []).append(
+            (entities[source], entities[target], types[type])
+        )
+    for owner, edges in relationships.items():
+        entities[owner].add_relationships(edges)
+
+    return entities[0]
@@ -138,20 +138,20 @@ class Model:
         )
 
         # Flexibility Rules:
-        disposition_flags = []
-        for i in range(self.sale_values.movements.size):
-            flag = False
-            if i > 1:
-                if not any(disposition_flags):
-                    if self.pgi_factor.movements.iloc[i] > 1.2:
-                        self.disposition_date = self.sale_values.movements.index[i]
-                        flag = True
-            disposition_flags.append(flag)
+        exercise = rk.policy.first_exercise(
+            states=self.pgi_factor.movements.iloc[: self.sale_values.movements.size],
+            condition=lambda factors: factors > 1.2,
+            earliest=2,
+        )
+        if exercise.exercised[0]:
+            self.disposition_date = self.sale_values.movements.index[
+                exercise.indices[0]
+            ]
 
         self.disposition = rk.flux.Flow(
             name="Disposition",
             movements=pd.Series(
-                data=self.sale_values.movements * disposition_flags,
+                data=exercise.select(self.sale_values.movements)[0],
                 index=self.sale_values.movements.index,
             ),
             units=params["units"],
@@ -12,8 +12,10 @@ import dotenv
 # In addition, in order to enable pytest to find all modules,
 # run tests via a 'python -m pytest tests/<test_file>.py' command from the root directory of this project
 import pandas as pd
+import pytest
+from specklepy import objects
 from specklepy.api import operations, client
-
+from specklepy.transports.sqlite import SQLiteTransport
 
 pd.set_option("display.max_columns", None)
 
@@ -254,3 +256,161 @@ class TestApi:
 #
 #         #
 #         #
+
+
+def _base(speckle_type: str = "Base", **members) -> objects.Base:
+    base = objects.Base.of_type(speckle_type)
+    for name, value in members.items():
+        base[name] = value
+    return base
+
+
+def _entitybase(entityId: str, assembly: bool = False, **members) -> objects.Base:
+    return _base(
+        (
+            "Rangekeeper.Entity:Rangekeeper.Assembly"
+            if assembly
+            else "Rangekeeper.Entity"
+        ),
+        entityId=entityId,
+        name=entityId,
+        type="test",
+        **members,
+    )
+
+
+class TestParse:
+    def test_parse(self):
+        a = _entitybase("a", gfa=1.0)
+        b = _entitybase("b", gfa=2.0)
+        relationship = _base(source=a, target=b, type="contains")
+        root = _entitybase(
+            "root",
+            assembly=True,
+            relationships=[relationship],
+            # An identical copy of b, and the same Base again:
+            elements=[a, _entitybase("b", gfa=2.0), a],
+        )
+
+        parsed = rk.api.Speckle.parse(base=root)
+        assert list(parsed.keys())[0] == "root"
+        assert set(parsed.keys()) == {"root", "a", "b"}
+        assert parsed["b"]["gfa"] == 2.0
+
+        # A dissimilar duplicate cannot be reconciled:
+        root["elements"].append(_entitybase("b", gfa=3.0))
+        with pytest.raises(Exception):
+            rk.api.Speckle.parse(base=root)
+
+    def test_parse_deep(self):
+        # Deeper than the recursion limit:
+        base = _entitybase("leaf")
+        for i in range(5000):
+            base = _base(child=base)
+        parsed = rk.api.Speckle.parse(base=base)
+        assert list(parsed.keys()) == ["leaf"]
+
+    def test_ingest(self, tmp_path):
+        a = _entitybase("a", gfa=1.0)
+        b = _entitybase("b", gfa=2.0)
+        building = _entitybase(
+            "building",
+            assembly=True,
+            relationships=[
+                _base(source=None, target=a, type="contains"),
+                _base(source=None, target=b, type="contains"),
+            ],
+        )
+        site = _entitybase(
+            "site",
+            assembly=True,
+            relationships=[_base(source=None, target=building, type="contains")],
+        )
+
+        expected = rk.api.Speckle.to_rk(
+            bases=list(rk.api.Speckle.parse(base=site).values()),
+            name="property",
+            type="archetype",
+        )
+        ingested = rk.api.Speckle.ingest(base=site, name="property", type="archetype")
+        assert set(ingested.graph.nodes) == set(expected.graph.nodes)
+        assert set(ingested.graph.edges(keys=True)) == set(
+            expected.graph.edges(keys=True)
+        )
+        assert ingested.get_entity("b")["gfa"] == 2.0
+        assert isinstance(ingested.get_entity("building"), rk.graph.Assembly)
+
+        # From a local SQLite transport:
+        transport = SQLiteTransport(base_path=str(tmp_path))
+        obj_id = operations.send(site, [transport], use_default_cache=False)
+        received = rk.api.Speckle.read(obj_id=obj_id, transport=transport)
+        ingested = rk.api.Speckle.ingest(
+            base=received, name="property", type="archetype"
+        )
+        assert set(ingested.graph.edges(keys=True)) == set(
+            expected.graph.edges(keys=True)
+        )
+
+        # From a serialized (JSON) file:
+        path = tmp_path / "site.json"
+        path.write_text(operations.serialize(site))
+        ingested = rk.api.Speckle.ingest(
+            base=rk.api.Speckle.read(path=path), name="property", type="archetype"
+        )
+        assert set(ingested.graph.nodes) == set(expected.graph.nodes)
+
+    def test_cache(self, tmp_path):
+        a = _entitybase("a", gfa=1.0)
+        b = _entitybase("b", gfa=2.0)
+        site = _entitybase(
+            "site",
+            assembly=True,
+            relationships=[
+                _base(source=None, target=a, type="contains"),
+                _base(source=None, target=b, type="contains"),
+            ],
+        )
+        transport = SQLiteTransport(base_path=str(tmp_path))
+        cache = rk.api.Cache(path=tmp_path / "cache.db")
+
+        obj_id = operations.send(site, [transport], use_default_cache=False)
+        loaded = rk.api.Speckle.load(
+            obj_id=obj_id, transport=transport, name="site", type="site", cache=cache
+        )
+        assert cache.hits == 0
+        assert obj_id in cache
+
+        cached = rk.api.Speckle.load(
+            obj_id=obj_id, transport=transport, name="site", type="site", cache=cache
+        )
+        assert cache.hits == 1
+        assert set(cached.graph.edges(keys=True)) == set(loaded.graph.edges(keys=True))
+        assert cached.get_entity("b")["gfa"] == 2.0
+
+        # Only the changed objects are converted again:
+        b["gfa"] = 3.0
+        obj_id = operations.send(site, [transport], use_default_cache=False)
+        changed = rk.api.Speckle.load(
+            obj_id=obj_id, transport=transport, name="site", type="site", cache=cache
+        )
+        assert cache.hits == 2  # Entity 'a'
+        assert changed.get_entity("b")["gfa"] == 3.0
+        assert changed.get_entity("a")["gfa"] == 1.0
+
+        # A loaded commit's root, nested in another commit, is reused as its Entity:
+        park = _entitybase(
+            "park",
+            assembly=True,
+            relationships=[_base(source=None, target=site, type="contains")],
+        )
+        obj_id = operations.send(park, [transport], use_default_cache=False)
+        nested = rk.api.Speckle.load(
+            obj_id=obj_id, transport=transport, name="park", type="park", cache=cache
+        )
+        assert set(nested.graph.edges(keys=True)) == {
+            ("park", "site", "contains"),
+            ("site", "a", "contains"),
+            ("site", "b", "contains"),
+        }
+        assert nested.get_entity("site")["entityId"] == "site"
+        cache.close()
@@ -16,10 +16,12 @@ from typing import List
 
 import matplotlib.pyplot as plt
 import multiprocess as mp
+from multiprocess import shared_memory
 import numpy as np
 
 import pandas as pd
 import pint
+import pytest
 
 import rangekeeper as rk
 
@@ -681,3 +683,221 @@ class TestDynamics:
         # result = policy.execute()
         # print(result.irrs)
         # action=action)
+
+    def test_batch_policy(self):
+        factors = [market.space_market_price_factors for market in TestDynamics.markets]
+        values = rk.policy.to_states(
+            [market.asset_true_value for market in TestDynamics.markets]
+        )
+
+        policy = rk.policy.BatchPolicy(
+            condition=lambda states: states > 1.2,
+            action=lambda values, decisions: np.where(decisions, values, 0.0),
+        )
+        decisions = policy.decide(factors)
+        assert decisions.shape == (TestDynamics.iterations, factors[0].movements.size)
+
+        # Matches a per-scenario evaluation:
+        for i, factor in enumerate(factors):
+            assert list(decisions[i]) == [value > 1.2 for value in factor.movements]
+
+        exercised = policy.execute((factors, values))
+        assert np.array_equal(exercised[decisions], values[decisions])
+        assert (exercised[~decisions] == 0).all()
+
+        with pytest.raises(ValueError):
+            rk.policy.BatchPolicy(
+                condition=lambda states: states[:, 1:] > 1.2, action=None
+            ).decide(factors)
+
+    def test_first_exercise(self):
+        factors = rk.policy.to_states(
+            [market.space_market_price_factors for market in TestDynamics.markets]
+        )
+        values = rk.policy.to_states(
+            [market.asset_true_value for market in TestDynamics.markets]
+        )
+        exercise = rk.policy.first_exercise(
+            states=factors, condition=lambda states: states > 1.2, earliest=2
+        )
+
+        for i, scenario in enumerate(factors):
+            triggers = [j for j in range(2, scenario.size) if scenario[j] > 1.2]
+            index = triggers[0] if len(triggers) > 0 else -1
+            assert exercise.indices[i] == index
+            assert exercise.exercised[i] == (index >= 0)
+            assert exercise.mask[i].sum() == (1 if index >= 0 else 0)
+
+            truncated = exercise.truncate(values)[i]
+            end = index if index >= 0 else scenario.size - 1
+            assert np.array_equal(truncated[: end + 1], values[i, : end + 1])
+            assert (truncated[end + 1 :] == 0).all()
+            assert exercise.select(values)[i].sum() == (
+                values[i, index] if index >= 0 else 0
+            )
+
+    def test_shared_scenarios(self):
+        with rk.dynamics.scenarios.Scenarios.from_likelihoods(
+            sequence=TestDynamics.sequence,
+            trends=TestDynamics.trends,
+            volatilities=TestDynamics.volatilities,
+            cyclicalities=TestDynamics.cyclicalities,
+            noise=TestDynamics.noise,
+            black_swan=TestDynamics.black_swan,
+            processes=4,
+        ) as scenarios:
+            assert len(scenarios) == TestDynamics.iterations
+            assert np.allclose(
+                scenarios.params["growth_rate"],
+                [trend.growth_rate for trend in TestDynamics.trends],
+            )
+            # The deterministic Flows match those of Markets generated as objects:
+            markets = rk.dynamics.scenarios.Scenarios.from_markets(TestDynamics.markets)
+            for name in ["space_market_price_factors", "asset_true_value"]:
+                assert np.allclose(scenarios[name], markets[name])
+            assert scenarios["returns"].shape == markets["returns"].shape
+
+            # Workers receive a handle to the shared arrays and their chunk bounds:
+            chunks = scenarios.map(
+                lambda chunk: chunk["asset_true_value"].max(axis=1),
+                chunksize=30,
+                processes=4,
+            )
+            assert len(chunks) == 4
+            assert np.allclose(
+                np.concatenate(chunks), scenarios["asset_true_value"].max(axis=1)
+            )
+
+        # Scenarios held in local memory are shared for the duration of a map:
+        sums = markets.map(lambda chunk: chunk["returns"].sum(), processes=2)
+        assert np.isclose(sum(sums), markets["returns"].sum())
+        flow = markets.to_flow("returns", scenario=3)
+        assert np.allclose(flow.movements, TestDynamics.markets[3].returns.movements)
+
+    def test_seeded_scenarios(self, tmp_path):
+        def generate(chunksize):
+            return rk.dynamics.scenarios.Scenarios.from_likelihoods(
+                sequence=TestDynamics.sequence,
+                trends=TestDynamics.trends[:4],
+                volatilities=TestDynamics.volatilities[:4],
+                cyclicalities=TestDynamics.cyclicalities[:4],
+                noise=TestDynamics.noise,
+                black_swan=TestDynamics.black_swan,
+                seed=42,
+                chunksize=chunksize,
+                processes=2,
+            )
+
+        # Scenarios are reproducible, however they are chunked across workers:
+        with generate(chunksize=1) as scenarios, generate(chunksize=3) as rechunked:
+            assert np.array_equal(scenarios["returns"], rechunked["returns"])
+            assert not np.array_equal(scenarios["returns"][0], scenarios["returns"][1])
+            assert scenarios.params["entropy"] == 42
+            scenarios.save(tmp_path)
+
+        # Each scenario's seed is kept (and stored):
+        loaded = rk.dynamics.scenarios.Scenarios.load(tmp_path)
+        seeds = np.random.SeedSequence(loaded.params["entropy"]).spawn(4)
+        assert [tuple(key) for key in loaded.params["spawn_key"]] == [
+            seed.spawn_key for seed in seeds
+        ]
+
+    def test_shared_scenarios_failure(self, monkeypatch):
+        handles = []
+        allocate = rk.dynamics.scenarios.SharedScenarios.allocate.__func__
+
+        def record(cls, **kwargs):
+            shared = allocate(cls, **kwargs)
+            handles.append(shared.handle)
+            return shared
+
+        monkeypatch.setattr(
+            rk.dynamics.scenarios.SharedScenarios, "allocate", classmethod(record)
+        )
+        # A scenario that cannot be generated (in a worker):
+        with pytest.raises(AttributeError):
+            rk.dynamics.scenarios.Scenarios.from_likelihoods(
+                sequence=TestDynamics.sequence,
+                trends=TestDynamics.trends[:3],
+                volatilities=TestDynamics.volatilities[:2] + [None],
+                cyclicalities=TestDynamics.cyclicalities[:3],
+                noise=TestDynamics.noise,
+                black_swan=TestDynamics.black_swan,
+                processes=2,
+            )
+        # The shared memory has been released:
+        for block, _ in handles[0].blocks.values():
+            with pytest.raises(FileNotFoundError):
+                shared_memory.SharedMemory(name=block)
+
+        with pytest.raises(ValueError):
+            rk.dynamics.scenarios.Scenarios.from_likelihoods(
+                sequence=TestDynamics.sequence,
+                trends=[],
+                volatilities=[],
+                cyclicalities=[],
+                noise=TestDynamics.noise,
+                black_swan=TestDynamics.black_swan,
+            )
+
+    def test_shared_scenarios_views(self):
+        markets = rk.dynamics.scenarios.Scenarios.from_markets(TestDynamics.markets)
+        shared = markets.share()
+        attached = shared.handle.attach()
+        returns = shared["returns"]
+        selected = attached.select(2, 5)["asset_true_value"]
+        flow = shared.to_flow("historical_value", scenario=3)
+        block = shared.handle.blocks["returns"][0]
+        attached.close()
+        shared.close()
+        assert block not in rk.dynamics.scenarios._attached
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=block)
+
+        # Views stay valid once closed, until they are garbage collected:
+        assert np.array_equal(returns, markets["returns"])
+        assert np.array_equal(selected, markets["asset_true_value"][2:5])
+        assert np.allclose(
+            flow.movements, TestDynamics.markets[3].historical_value.movements
+        )
+
+    def test_scenario_store(self, tmp_path):
+        scenarios = rk.dynamics.scenarios.Scenarios.from_markets(TestDynamics.markets)
+        scenarios.params = {
+            "iterations": TestDynamics.iterations,
+            "growth_rates": np.array(
+                [trend.growth_rate for trend in TestDynamics.trends]
+            ),
+        }
+        scenarios.save(tmp_path)
+
+        loaded = rk.dynamics.scenarios.Scenarios.load(tmp_path)
+        assert len(loaded) == TestDynamics.iterations
+        assert loaded.params["iterations"] == TestDynamics.iterations
+        assert np.array_equal(
+            loaded.params["growth_rates"], scenarios.params["growth_rates"]
+        )
+        for name in rk.dynamics.scenarios.FLOWS:
+            assert isinstance(loaded[name], np.memmap)
+            assert np.array_equal(loaded[name], scenarios[name])
+            assert loaded.dates[name].equals(scenarios.dates[name])
+
+        subset = loaded.take([5, 17, 3])
+        assert np.array_equal(subset["returns"], scenarios["returns"][[5, 17, 3]])
+        assert np.allclose(
+            subset.to_flow("historical_value", scenario=1).movements,
+            TestDynamics.markets[17].historical_value.movements,
+        )
+
+        # Workers map the store themselves:
+        maxima = loaded.map(
+            lambda chunk: chunk["historical_value"].max(axis=1), processes=2
+        )
+        assert np.array_equal(
+            np.concatenate(maxima), scenarios["historical_value"].max(axis=1)
+        )
+
+        assert not isinstance(
+            rk.dynamics.scenarios.Scenarios.load(tmp_path, mmap=False)["returns"],
+            np.memmap,
+        )
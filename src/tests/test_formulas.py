@@ -379,6 +379,48 @@ class TestFinancial:
 
         assert profit.sum().total().magnitude == approx(495337.17)
 
+    def test_aligned_transactions(self):
+        sequence = self.model.model_span.to_sequence(frequency=self.params["frequency"])
+        data = np.insert(np.full(sequence.size - 1, -1e4), 0, self.params["costs"])
+        rate = self.params["interest_rate_pa"] / rk.duration.Period.yearly_count(
+            (self.params["frequency"])
+        )
+
+        aligned = rk.flux.Flow.from_sequence(
+            name="Aligned Transactions",
+            data=data,
+            sequence=sequence,
+            units=currency.units,
+        )
+        unaligned = rk.flux.Flow(
+            name="Unaligned Transactions",
+            movements=pd.Series(
+                data=data,
+                index=sequence.to_timestamp(how="start") + pd.Timedelta(days=14),
+            ),
+            units=currency.units,
+        )
+        assert aligned.is_aligned(frequency=self.params["frequency"])
+        assert not unaligned.is_aligned(frequency=self.params["frequency"])
+
+        accounts = [
+            rk.formula.financial.Account(
+                starting=0,
+                transactions=transactions,
+                frequency=self.params["frequency"],
+                type=rk.formula.financial.Account.Type.COMPOUND,
+                rate=rate,
+            )
+            for transactions in [aligned, unaligned]
+        ]
+        for flow in ["startings", "endings", "overdraft", "interest"]:
+            assert getattr(accounts[0], flow).movements.equals(
+                getattr(accounts[1], flow).movements
+            )
+        assert (
+            accounts[0].endings.movements.index is accounts[0].interest.movements.index
+        )
+
 
 class TestSolver:
     def test_residual(self):
@@ -5,12 +5,14 @@ import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+import pytest
 
 import networkx as nx
 
 import specklepy.objects as objects
 
-# import rangekeeper as rk
+import rangekeeper as rk
+
 #
 # # Pytests file.
 # # Note: gathers tests according to a naming convention.
@@ -89,3 +91,446 @@ import specklepy.objects as objects
 #     #     assert element_grandchild01['children'] == {}
 #     #     assert element_grandchild02['children'] == {}
 #
+
+
+def _tree(depth: int, breadth: int) -> rk.graph.Assembly:
+    """
+    Returns an arborescent Assembly of 'contains' relationships, with a unit 'gfa' on each leaf
+    """
+    assembly = rk.graph.Assembly(name="tree", type="tree")
+    root = rk.graph.Entity(entityId="root", name="root", type="root")
+    parents = [root]
+    relationships = []
+    for level in range(depth):
+        children = []
+        for parent in parents:
+            for i in range(breadth):
+                child = rk.graph.Entity(
+                    entityId="{0}.{1}".format(parent.entityId, i),
+                    name="level{0}".format(level),
+                    type="level{0}".format(level),
+                )
+                relationships.append((parent, child, "contains"))
+                children.append(child)
+        parents = children
+    for leaf in parents:
+        leaf["gfa"] = 1.0
+    assembly.add_relationships(relationships)
+    return assembly
+
+
+class TestAssembly:
+    def test_entity_index(self):
+        assembly = _tree(depth=2, breadth=2)
+        assert len(assembly.get_entities()) == 7
+        assert assembly.get_entity("root.1.0")["type"] == "level1"
+
+        orphan = rk.graph.Entity(entityId="orphan", name="orphan", type="orphan")
+        assembly.add_entities([orphan])
+        assert assembly.get_entity("orphan") is orphan
+        assert assembly.graph.nodes["orphan"]["entity"] is orphan
+
+        # Modifying the graph directly is reflected in the index:
+        stray = rk.graph.Entity(entityId="stray", name="stray", type="stray")
+        assembly.graph.add_node("stray", entity=stray)
+        assert assembly.get_entity("stray") is stray
+
+        subgraph = assembly.filter_by_type(relationship_type="contains")
+        assert set(subgraph.get_entities().keys()) == set(
+            assembly.get_entities().keys()
+        ) - {"orphan", "stray"}
+
+        # A node without an Entity is indexed once, and does not clear the caches:
+        assembly.graph.add_node("bare")
+        assert "bare" not in assembly.get_entities()
+        subgraph = assembly.filter_by_type(relationship_type="contains")
+        assert assembly.filter_by_type(relationship_type="contains") is subgraph
+        assembly.aggregate(
+            property="gfa", label="subtotal_gfa", relationship_type="contains"
+        )
+        state = assembly._aggregations["subtotal_gfa"]
+        assembly.get_entity("root")
+        assert assembly._aggregations["subtotal_gfa"] is state
+
+        # Edges added or removed directly (without changing the nodes) also are:
+        assembly.graph.remove_edge("root", "root.1", "contains")
+        assembly.graph.add_edge("root.0", "root.1", "contains")
+        assert assembly.filter_by_type(relationship_type="contains") is not subgraph
+        assert "subtotal_gfa" not in assembly._aggregations
+
+    def test_add_relationships(self):
+        assembly = _tree(depth=2, breadth=2)
+        assert assembly.graph.number_of_edges() == 6
+        assert all(
+            assembly.graph.nodes[entityId]["entity"].entityId == entityId
+            for entityId in assembly.graph.nodes
+        )
+
+        # The last Entity given for an entityId is kept:
+        replacement = rk.graph.Entity(entityId="root.1", name="new", type="level0")
+        assembly.add_relationships(
+            [
+                (assembly.get_entity("root"), replacement, "contains"),
+                (replacement, assembly.get_entity("root.0"), "adjoins"),
+            ]
+        )
+        assert assembly.graph.number_of_edges() == 7
+        assert assembly.graph.nodes["root.1"]["entity"] is replacement
+        assert assembly.get_entity("root.1") is replacement
+
+    def test_subentities(self):
+        site = rk.graph.Assembly(entityId="site", name="site", type="site")
+        building = _tree(depth=2, breadth=2)
+        building.entityId = "building"
+        garden = rk.graph.Entity(entityId="garden", name="garden", type="garden")
+        site.add_relationships(
+            [(site, building, "contains"), (site, garden, "contains")]
+        )
+        # A nested reference back to the site is not revisited:
+        building.add_relationship((building.get_entity("root.1"), site, "adjoins"))
+
+        assert set(site.get_subassemblies().keys()) == {"building"}
+        assert set(site.get_subentities().keys()) == {
+            "building",
+            "garden",
+            "root",
+            "root.0",
+            "root.1",
+            "root.0.0",
+            "root.0.1",
+            "root.1.0",
+            "root.1.1",
+        }
+        assert next(site.iter_subentities()) is building
+
+        # Deeper than the recursion limit:
+        outer = rk.graph.Assembly(entityId="0", name="0", type="nest")
+        assembly = outer
+        for i in range(1, 3000):
+            nested = rk.graph.Assembly(entityId=str(i), name=str(i), type="nest")
+            assembly.add_relationship((assembly, nested, "contains"))
+            assembly = nested
+        assert len(outer.get_subassemblies()) == 2999
+
+    def test_relationship_index(self):
+        assembly = _tree(depth=2, breadth=2)
+        assembly.add_relationship(
+            (assembly.get_entity("root.0.1"), assembly.get_entity("root.1"), "adjoins")
+        )
+
+        roots = assembly.get_roots()
+        assert [root.entityId for root in roots["contains"]] == ["root"]
+        assert [root.entityId for root in roots["adjoins"]] == ["root.0.1"]
+        leaves = assembly.get_leaves()
+        assert len(leaves["contains"]) == 4
+        assert [leaf.entityId for leaf in leaves["adjoins"]] == ["root.1"]
+
+        leaf = assembly.get_entity("root.0.1")
+        assert list(
+            leaf.get_ancestors(relationship_type="contains", assembly=assembly).keys()
+        ) == ["root.0", "root"]
+        assert [
+            relative.entityId
+            for relative in leaf.get_relatives(
+                relationship_type="adjoins", assembly=assembly
+            )
+        ] == ["root.1"]
+
+        # Subgraph views are cached until the Assembly is modified:
+        contains = assembly.filter_by_type(relationship_type="contains")
+        assert assembly.filter_by_type(relationship_type="contains") is contains
+        assert contains.graph.number_of_edges() == 6
+
+        child = rk.graph.Entity(entityId="root.1.2", name="level1", type="level1")
+        assembly.add_relationship((assembly.get_entity("root.1"), child, "contains"))
+        updated = assembly.filter_by_type(relationship_type="contains")
+        assert updated is not contains
+        assert updated.graph.number_of_edges() == 7
+        assert len(assembly.get_leaves()["contains"]) == 5
+
+        # Relationships added to (or removed from) the graph directly are indexed:
+        assembly.graph.add_edge("root.1.2", "root.0", key="adjoins")
+        assert len(assembly.get_roots()["adjoins"]) == 2
+        assert [
+            relative.entityId
+            for relative in child.get_relatives(
+                relationship_type="adjoins", assembly=assembly
+            )
+        ] == ["root.0"]
+        assembly.graph.remove_edge("root.1", "root.1.2", key="contains")
+        assert len(assembly.get_leaves()["contains"]) == 4
+        assert (
+            assembly.filter_by_type(
+                relationship_type="contains"
+            ).graph.number_of_edges()
+            == 6
+        )
+
+        # As are nested Assemblies:
+        annex = _tree(depth=1, breadth=2)
+        annex.entityId = "annex"
+        assembly.graph.add_node("annex", entity=annex)
+        assert "annex" in assembly.get_subassemblies()
+        assembly.graph.add_edge("annex", "root.0", key="adjoins")
+        annex.graph.add_edge("root.0", "root.1", key="adjoins")
+        nested = assembly.get_subassemblies()["annex"]
+        assert [leaf.entityId for leaf in nested.get_leaves()["adjoins"]] == ["root.1"]
+
+    def test_labels(self):
+        assembly = _tree(depth=2, breadth=2)
+
+        labels = assembly._get_labels()
+        assert labels["root"]["trunk"] is None
+        assert labels["root.1.0"] == {
+            "parent": "root.1",
+            "depth": 2,
+            "path": ("root", "root.1"),
+            "trunk": 1,
+        }
+        assert assembly._get_trunk_index("root.0.1") == 0
+
+        df = assembly.to_DataFrame()
+        assert df.loc["root.1.0", "parent"] == "root.1"
+        assert df.loc["root", "parent"] is None
+        assert sorted(df.loc["root", "children"]) == ["root.0", "root.1"]
+
+        # The table matches the Entities' key-value pairs:
+        records = pd.DataFrame.from_dict(assembly.to_dict(), orient="index")
+        pd.testing.assert_frame_equal(
+            df.drop(columns=["children"]),
+            records[df.columns].drop(columns=["children"]),
+        )
+        df = assembly.to_DataFrame(properties=["name", "gfa"])
+        assert list(df.columns) == ["name", "gfa", "parent", "children"]
+
+        trace = assembly.sunburst(property="gfa")
+        assert len(trace.ids) == 7
+        assert list(trace.parents) == list(df["parent"])
+
+
+class TestAggregation:
+    def test_aggregate_sum(self):
+        assembly = _tree(depth=3, breadth=3)
+        assembly.aggregate(
+            property="gfa", label="subtotal_gfa", relationship_type="contains"
+        )
+
+        assert assembly.get_entity("root")["subtotal_gfa"] == 27
+        assert assembly.get_entity("root.0")["subtotal_gfa"] == 9
+        assert assembly.get_entity("root.0.1.2")["subtotal_gfa"] == 1
+
+    def test_aggregate_function(self):
+        assembly = _tree(depth=2, breadth=2)
+
+        def count(aggregation: dict, entity: rk.graph.Entity) -> int:
+            return len(aggregation)
+
+        assembly.aggregate(property="gfa", label="count", function=count)
+
+        assert assembly.get_entity("root")["count"] == 7
+        assert assembly.get_entity("root.1")["count"] == 3
+
+    def test_aggregate_deep(self):
+        # Deeper than the recursion limit:
+        assembly = rk.graph.Assembly(name="chain", type="chain")
+        entities = [
+            rk.graph.Entity(entityId=str(i), name=str(i), type="link")
+            for i in range(5000)
+        ]
+        entities[-1]["gfa"] = 2.0
+        assembly.add_relationships(
+            [
+                (parent, child, "contains")
+                for parent, child in zip(entities, entities[1:])
+            ]
+        )
+        assembly.aggregate(property="gfa", label="subtotal_gfa")
+
+        assert entities[0]["subtotal_gfa"] == 2.0
+
+    def test_reaggregate(self):
+        assembly = _tree(depth=3, breadth=3)
+        calls = []
+
+        def count(aggregation, entity):
+            calls.append(entity.entityId)
+            return len(aggregation)
+
+        assembly.aggregate(
+            property="gfa", label="subtotal_gfa", relationship_type="contains"
+        )
+        assembly.aggregate(property="gfa", label="count", function=count)
+        assert len(calls) == 40
+
+        # Repeating an aggregation is idempotent, and recomputes nothing:
+        calls.clear()
+        assembly.aggregate(
+            property="gfa", label="subtotal_gfa", relationship_type="contains"
+        )
+        assembly.aggregate(property="gfa", label="count", function=count)
+        assert assembly.get_entity("root")["subtotal_gfa"] == 27.0
+        assert calls == []
+
+        # Only sums are kept for re-aggregation, not whole subtrees' aggregations:
+        assert len(assembly._aggregations["subtotal_gfa"]["results"]) == 40
+        assert assembly._aggregations["count"]["results"] == {}
+
+        # Only the changed Entity and its ancestors are recomputed:
+        assembly.get_entity("root.1.2.0")["gfa"] = 5.0
+        assembly.aggregate(
+            property="gfa", label="subtotal_gfa", relationship_type="contains"
+        )
+        assembly.aggregate(property="gfa", label="count", function=count)
+        assert calls == ["root.1.2.0", "root.1.2", "root.1", "root"]
+        assert assembly.get_entity("root")["count"] == 40
+        assert assembly.get_entity("root.1")["count"] == 13
+        assert assembly.get_entity("root")["subtotal_gfa"] == 31.0
+        assert assembly.get_entity("root.1")["subtotal_gfa"] == 13.0
+        assert assembly.get_entity("root.0")["subtotal_gfa"] == 9.0
+
+        # Assigning other properties recomputes nothing:
+        calls.clear()
+        assembly.get_entity("root.0.0.0")["area"] = 2.0
+        assembly.aggregate(property="gfa", label="count", function=count)
+        assert calls == []
+
+        # Unchanged subtrees are gathered in the same order as a full aggregation:
+        def total(aggregation, entity):
+            return [value for value in aggregation.values() if value is not None]
+
+        assembly.get_entity("root.2.1.1")["gfa"] = 3.0
+        assembly.aggregate(property="gfa", label="total", function=total)
+        fresh = _tree(depth=3, breadth=3)
+        fresh.get_entity("root.1.2.0")["gfa"] = 5.0
+        fresh.get_entity("root.2.1.1")["gfa"] = 3.0
+        fresh.aggregate(property="gfa", label="total", function=total)
+        assembly.get_entity("root.0.1.2")["gfa"] = 4.0
+        fresh.get_entity("root.0.1.2")["gfa"] = 4.0
+        assembly.aggregate(property="gfa", label="total", function=total)
+        fresh.aggregate(property="gfa", label="total", function=total)
+        for entityId, entity in fresh.get_entities().items():
+            assert assembly.get_entity(entityId)["total"] == entity["total"]
+
+        # Modifying the Assembly requires a full aggregation:
+        child = rk.graph.Entity(entityId="root.0.3", name="level1", type="level1")
+        child.gfa = 1.0
+        assembly.add_relationship((assembly.get_entity("root"), child, "contains"))
+        assembly.aggregate(property="gfa", label="subtotal_gfa")
+        assert assembly.get_entity("root")["subtotal_gfa"] == 37.0
+
+    def test_aggregate_parallel(self):
+        assembly = _tree(depth=3, breadth=3)
+        parallel = _tree(depth=3, breadth=3)
+
+        def count(aggregation, entity):
+            return len(aggregation)
+
+        assembly.aggregate(property="gfa", label="subtotal_gfa")
+        assembly.aggregate(property="gfa", label="count", function=count)
+        parallel.aggregate(property="gfa", label="subtotal_gfa", processes=4)
+        parallel.aggregate(property="gfa", label="count", function=count, processes=4)
+        for entityId, entity in assembly.get_entities().items():
+            assert (
+                parallel.get_entity(entityId)["subtotal_gfa"] == entity["subtotal_gfa"]
+            )
+            assert parallel.get_entity(entityId)["count"] == entity["count"]
+
+        # Changes are re-aggregated concurrently too:
+        parallel.get_entity("root.2.0.1")["gfa"] = 3.0
+        parallel.aggregate(property="gfa", label="subtotal_gfa", processes=4)
+        assert parallel.get_entity("root")["subtotal_gfa"] == 29.0
+        assert parallel.get_entity("root.2")["subtotal_gfa"] == 11.0
+
+    def test_aggregate_subtotals(self):
+        frequency = rk.duration.Type.MONTH
+        sequence = rk.duration.Sequence.from_bounds(
+            include_start=pd.Timestamp(2020, 1, 1),
+            bound=pd.Timestamp(2020, 12, 31),
+            frequency=frequency,
+        )
+        assembly = _tree(depth=2, breadth=3)
+        for entity in assembly.get_leaves()["contains"]:
+            entity["income"] = rk.flux.Flow.from_sequence(
+                sequence=sequence, data=[1.0] * 12, name="Income"
+            )
+
+        def aggregate_incomes(**kwargs):
+            return rk.graph.Entity.aggregate_flows(
+                **kwargs, name="Income", frequency=frequency
+            )
+
+        assembly.aggregate(
+            property="income",
+            label="subtotal_income",
+            function=aggregate_incomes,
+            subtotals=True,
+            processes=2,
+        )
+        root = assembly.get_entity("root")
+        # The root's Stream combines its children's subtotals, not every leaf:
+        assert len(root["subtotal_income"].flows) == 3
+        assert root["subtotal_income"].sum().movements.sum() == 9 * 12
+        assert (
+            assembly.get_entity("root.1")["subtotal_income"].sum().movements.sum()
+            == 3 * 12
+        )
+
+
+class TestCompactAssembly:
+    def test_traversal(self):
+        assembly = _tree(depth=3, breadth=2)
+        compact = rk.graph.CompactAssembly.from_assembly(assembly)
+        assert compact.properties["gfa"].dtype == float
+        assert compact.properties["type"].dtype == object
+
+        assert list(compact.get_roots()["contains"]) == ["root"]
+        assert set(compact.get_leaves()["contains"]) == {
+            leaf.entityId for leaf in assembly.get_leaves()["contains"]
+        }
+        assert list(compact.get_relatives("root.1")) == ["root.1.0", "root.1.1"]
+        assert list(compact.get_relatives("root.1", outgoing=False)) == ["root"]
+        assert compact.get_ancestors("root.1.0.1", relationship_type="contains") == [
+            "root.1.0",
+            "root.1",
+            "root",
+        ]
+
+    def test_aggregate(self):
+        assembly = _tree(depth=3, breadth=3)
+        compact = rk.graph.CompactAssembly.from_assembly(assembly, properties=["gfa"])
+        assembly.aggregate(property="gfa", label="subtotal_gfa")
+        compact.aggregate(
+            property="gfa", label="subtotal_gfa", relationship_type="contains"
+        )
+        df = compact.to_DataFrame()
+        for entityId, entity in assembly.get_entities().items():
+            assert df.loc[entityId, "subtotal_gfa"] == entity["subtotal_gfa"]
+
+        compact.aggregate(property="gfa", label="max_gfa", function=np.maximum)
+        assert df.shape[0] == 40
+        assert compact.properties["max_gfa"][compact.index["root"]] == 1.0
+        with pytest.raises(TypeError):
+            compact.aggregate(
+                property="gfa", label="count", function=lambda **kwargs: 1
+            )
+
+    def test_aggregate_large(self):
+        size = 100000
+        rng = np.random.default_rng(seed=0)
+        parents = np.array([rng.integers(0, i) for i in range(1, size)])
+        compact = rk.graph.CompactAssembly(
+            entityIds=[str(i) for i in range(size)],
+            relationships={"contains": (parents, np.arange(1, size))},
+            properties={"gfa": np.ones(size)},
+        )
+        compact.aggregate(property="gfa", label="subtotal_gfa")
+        assert compact.properties["subtotal_gfa"][0] == size
+
+        # Not a tree:
+        cyclic = rk.graph.CompactAssembly(
+            entityIds=["a", "b", "c"],
+            relationships={"contains": (np.array([0, 1, 2]), np.array([1, 2, 1]))},
+            properties={"gfa": np.ones(3)},
+        )
+        with pytest.raises(NotImplementedError):
+            cyclic.aggregate(property="gfa", label="subtotal_gfa")
@@ -1,6 +1,8 @@
 import datetime
 import locale
 import math
+import subprocess
+import sys
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -61,6 +63,131 @@ class TestDistribution:
 
         # print(pert_value)
 
+    def test_sampling(self):
+        pert_dist = rk.distribution.PERT(
+            peak=0.75, weighting=4, generator=np.random.default_rng(7)
+        )
+        for sampling in rk.distribution.Sampling:
+            samples = pert_dist.sample(size=1024, sampling=sampling)
+            assert samples.shape == (1024,)
+            assert samples.mean() == approx(pert_dist.dist.mean(), abs=0.01)
+
+        # Low-discrepancy and stratified samples converge faster than random ones:
+        errors = {
+            sampling: np.mean(
+                [
+                    abs(
+                        np.quantile(pert_dist.sample(size=256, sampling=sampling), 0.9)
+                        - pert_dist.dist.ppf(0.9)
+                    )
+                    for _ in range(20)
+                ]
+            )
+            for sampling in rk.distribution.Sampling
+        }
+        for sampling in [
+            rk.distribution.Sampling.SOBOL,
+            rk.distribution.Sampling.HALTON,
+            rk.distribution.Sampling.LATIN_HYPERCUBE,
+        ]:
+            assert errors[sampling] < errors[rk.distribution.Sampling.RANDOM]
+
+        # Latin hypercube samples fall one in each stratum:
+        uniforms = rk.distribution.uniforms(
+            size=100, dimensions=3, sampling=rk.distribution.Sampling.LATIN_HYPERCUBE
+        )
+        for dimension in uniforms.T:
+            assert (np.sort(np.floor(dimension * 100)) == np.arange(100)).all()
+
+        # Antithetic samples come in pairs:
+        uniforms = rk.distribution.uniforms(
+            size=10, sampling=rk.distribution.Sampling.ANTITHETIC
+        )
+        assert np.allclose(uniforms[:5] + uniforms[5:], 1)
+
+        # The same seeds give the same samples, in every sampling mode:
+        def forms(seed):
+            return [
+                rk.distribution.PERT(
+                    peak=0.3, generator=np.random.default_rng(seed + i)
+                )
+                for i in range(2)
+            ]
+
+        for sampling in rk.distribution.Sampling:
+            assert np.array_equal(
+                rk.distribution.sample(forms(5), size=16, sampling=sampling),
+                rk.distribution.sample(forms(5), size=16, sampling=sampling),
+            )
+            assert np.array_equal(
+                rk.distribution.sample(
+                    forms(5),
+                    size=16,
+                    sampling=sampling,
+                    generator=np.random.default_rng(11),
+                ),
+                rk.distribution.sample(
+                    forms(7),
+                    size=16,
+                    sampling=sampling,
+                    generator=np.random.default_rng(11),
+                ),
+            )
+
+        # Distributions are sampled jointly, including point masses:
+        samples = rk.distribution.sample(
+            forms=[
+                pert_dist,
+                rk.distribution.Symmetric(
+                    type=rk.distribution.Type.UNIFORM, mean=0.5, residual=0.0
+                ),
+            ],
+            size=64,
+            sampling=rk.distribution.Sampling.SOBOL,
+        )
+        assert samples.shape == (64, 2)
+        assert (samples[:, 1] == 0.5).all()
+
+    def test_table(self):
+        probabilities = np.concatenate(
+            [np.random.default_rng(3).random(100000), [0, 1e-9, 0.5, 1 - 1e-9, 1]]
+        )
+        for form in [
+            rk.distribution.PERT(peak=1.0, weighting=4.0, minimum=0.5, maximum=1.75),
+            rk.distribution.Symmetric(
+                type=rk.distribution.Type.TRIANGULAR, mean=0.05, residual=0.005
+            ),
+        ]:
+            exact = form.quantile(probabilities)
+            # Tolerances are relative to the interquartile range:
+            iqr = np.subtract(*form.quantile(np.array([0.75, 0.25])))
+            nodes = 0
+            for tolerance in [1e-3, 1e-4, 1e-5]:
+                table = form.tabulate(tolerance=tolerance)
+                assert (
+                    np.abs(table.quantile(probabilities) - exact).max()
+                    <= tolerance * iqr
+                )
+                assert table.probabilities.size >= nodes
+                nodes = table.probabilities.size
+            assert form.tabulate(tolerance=1e-5) is table
+
+            samples = table.sample(size=4096, sampling=rk.distribution.Sampling.SOBOL)
+            assert samples.mean() == approx(form.dist.mean(), rel=1e-3)
+
+        with pytest.raises(ValueError):
+            rk.distribution.Table(
+                form=rk.distribution.PERT(peak=0.5), tolerance=1e-10, limit=1000
+            )
+
+        # A table's size is independent of its distribution's scale:
+        assert (
+            rk.distribution.PERT(peak=1.2e6, minimum=1e6, maximum=2e6)
+            .tabulate()
+            .probabilities.size
+            == rk.distribution.PERT(peak=0.2).tabulate().probabilities.size
+        )
+
 
 class TestDuration:
     def test_offset(self):
@@ -564,3 +691,18 @@ class TestType:
 # def test_query(self):
 #     query = rk.api.Speckle.query2('https://speckle.xyz/streams/1dd7d041b5/objects/33cfc8f0cdfc980b783f00cc35167fc6')
 #     print(query)
+
+
+class TestImport:
+    def test_lazy_imports(self):
+        # Plotting, visualization and Speckle client libraries are only imported on use:
+        code = (
+            "import sys; import rangekeeper; "
+            "print(sorted({'matplotlib', 'plotly', 'pyvis', 'IPython', "
+            "'specklepy.api.client', 'rangekeeper.api'} & set(sys.modules)))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "[]"
+        assert rk.api.Speckle is not None
@@ -0,0 +1,78 @@
+import datetime
+import json
+
+import numpy as np
+
+import rangekeeper as rk
+
+
+def _flow(name: str) -> rk.flux.Flow:
+    return rk.flux.Flow.from_sequence(
+        sequence=rk.duration.Sequence.from_bounds(
+            include_start=datetime.date(2020, 1, 1),
+            frequency=rk.duration.Type.MONTH,
+            bound=24,
+        ),
+        data=np.ones(24),
+        name=name,
+    )
+
+
+class TestProfiling:
+    def test_disabled(self):
+        assert rk.profiling._active is None
+        _flow("Rent")
+        assert rk.profiling._active is None
+
+    def test_profile(self, tmp_path):
+        with rk.profiling.profile() as profiler:
+            rent = _flow("Rent")
+            rk.formula.financial.Account(
+                transactions=_flow("Draws"),
+                frequency=rk.duration.Type.MONTH,
+                rate=0.01,
+                name="Loan",
+            )
+            rk.flux.Stream(
+                name="Revenue",
+                flows=[rent, _flow("Parking")],
+                frequency=rk.duration.Type.YEAR,
+            )
+        assert rk.profiling._active is None
+        _flow("Unprofiled")
+
+        report = profiler.report()
+        counts = report.set_index(["call", "name"])["count"]
+        assert counts[("Flow", "Rent")] >= 1
+        assert (report["call"] == "Account").sum() == 1
+        assert counts[("Stream", "Revenue")] == 1
+        assert ("Flow", "Unprofiled") not in counts.index
+        assert (report["own"] <= report["total"] + 1e-12).all()
+
+        # A Stream's own time excludes the time spent resampling its Flows:
+        summary = profiler.summary()
+        assert summary.loc["Flow.resample", "count"] >= 2
+        assert summary.loc["Stream", "own"] < summary.loc["Stream", "total"]
+
+        trace = profiler.to_chrome_trace(path=tmp_path / "trace.json")
+        with open(tmp_path / "trace.json", "r") as file:
+            assert json.load(file) == trace
+        assert len(trace["traceEvents"]) == report["count"].sum()
+        stream = next(
+            event
+            for event in trace["traceEvents"]
+            if event["name"] == "Stream: Revenue"
+        )
+        assert stream["ph"] == "X"
+        assert stream["dur"] > 0
+
+    def test_nested(self):
+        with rk.profiling.profile(trace=False) as outer:
+            _flow("Outer")
+            with rk.profiling.profile() as inner:
+                _flow("Inner")
+            _flow("Outer")
+        assert rk.profiling._active is None
+        assert outer.events == []
+        assert set(outer.report()["name"]) == {"Outer"}
+        assert set(inner.report()["name"]) == {"Inner"}
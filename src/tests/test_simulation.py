@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+import rangekeeper as rk
+
+
+def _generate(start, stop, generator):
+    return generator.lognormal(mean=0.0, sigma=0.5, size=stop - start)
+
+
+def _evaluate(chunk):
+    # An IRR that cannot be solved for is represented as NaN:
+    return {"npv": chunk * 100 - 100, "irr": np.where(chunk > 3, np.nan, chunk - 1)}
+
+
+class TestSimulation:
+    def test_moments(self):
+        values = np.random.default_rng(1).normal(size=1000)
+        moments = rk.simulation.Moments()
+        for chunk in np.array_split(values, 7):
+            moments.update(chunk)
+        assert moments.count == 1000
+        assert moments.mean == pytest.approx(values.mean())
+        assert moments.variance == pytest.approx(values.var(ddof=1))
+        assert (moments.min, moments.max) == (values.min(), values.max())
+
+    def test_quantile(self):
+        values = np.random.default_rng(2).normal(size=50000)
+        for p in [0.05, 0.5, 0.95]:
+            quantile = rk.simulation.Quantile(p)
+            for chunk in np.array_split(values, 50):
+                quantile.update(chunk)
+            assert quantile.value == pytest.approx(np.quantile(values, p), abs=0.02)
+
+        quantile = rk.simulation.Quantile(0.5)
+        quantile.update([3.0, 1.0, 2.0])
+        assert quantile.value == 2.0
+
+    def test_simulation(self):
+        simulation = rk.simulation.Simulation(
+            generate=_generate, evaluate=_evaluate, seed=42, bins=20
+        )
+        statistics = simulation.run(count=20000, chunksize=1000)
+
+        # Regenerate all scenarios, with the same seeds, to check the statistics:
+        values = np.concatenate(
+            [
+                _generate(
+                    start,
+                    start + 1000,
+                    np.random.default_rng(
+                        np.random.SeedSequence(42, spawn_key=(start,))
+                    ),
+                )
+                for start in range(0, 20000, 1000)
+            ]
+        )
+        npvs = values * 100 - 100
+        npv = statistics["npv"]
+        assert npv.count == 20000
+        assert npv.mean == pytest.approx(npvs.mean())
+        assert npv.std == pytest.approx(npvs.std(ddof=1))
+        assert npv.quantiles[0.5].value == pytest.approx(np.median(npvs), rel=0.02)
+        assert (
+            npv.histogram.counts.sum()
+            + npv.histogram.underflow
+            + npv.histogram.overflow
+            == 20000
+        )
+
+        irr = statistics["irr"]
+        assert irr.invalid == (values > 3).sum()
+        assert irr.count + irr.invalid == 20000
+        assert irr.to_dict()["p50"] == irr.quantiles[0.5].value
+
+        # Running in parallel folds the same chunks:
+        parallel = rk.simulation.Simulation(
+            generate=_generate, evaluate=_evaluate, seed=42, bins=20
+        ).run(count=20000, chunksize=1000, processes=4)
+        assert parallel["npv"].mean == pytest.approx(npv.mean)
+        assert parallel["npv"].quantiles[0.95].value == pytest.approx(
+            npv.quantiles[0.95].value
+        )
+
+        # Further runs continue from the scenarios already run:
+        simulation.run(count=5000, chunksize=1000)
+        assert simulation.count == 25000
+        assert statistics["npv"].count == 25000
+
+        # Running no scenarios (in parallel or not) changes nothing:
+        simulation.run(count=0, chunksize=1000, processes=4)
+        simulation.run(count=0, chunksize=1000)
+        assert simulation.count == 25000
+        assert statistics["npv"].count == 25000
@@ -0,0 +1,127 @@
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+import rangekeeper as rk
+
+from .test_graph import _tree
+
+
+def _model() -> rk.graph.Assembly:
+    frequency = rk.duration.Type.MONTH
+    sequence = rk.duration.Sequence.from_bounds(
+        include_start=pd.Timestamp(2020, 1, 1),
+        bound=pd.Timestamp(2020, 12, 31),
+        frequency=frequency,
+    )
+    assembly = _tree(depth=2, breadth=2)
+    for i, entity in enumerate(assembly.get_leaves()["contains"]):
+        entity["income"] = rk.flux.Flow.from_sequence(
+            sequence=sequence, data=[float(i)] * 12, name="Income"
+        )
+        entity["params"] = {"use": "residential", "floor": i}
+        entity["tenant"] = None
+
+    def aggregate_incomes(**kwargs):
+        return rk.graph.Entity.aggregate_flows(
+            **kwargs, name="Income", frequency=frequency
+        )
+
+    assembly.aggregate(
+        property="income",
+        label="subtotal_income",
+        function=aggregate_incomes,
+        subtotals=True,
+    )
+    assembly.aggregate(property="gfa", label="subtotal_gfa")
+
+    # A nested Assembly:
+    building = _tree(depth=1, breadth=2)
+    building.entityId = "building"
+    assembly.add_relationship((assembly.get_entity("root"), building, "contains"))
+    return assembly
+
+
+class TestSnapshot:
+    def test_roundtrip(self, tmp_path):
+        assembly = _model()
+        rk.snapshot.save(assembly, tmp_path)
+
+        for mmap in [True, False]:
+            loaded = rk.snapshot.load(tmp_path, mmap=mmap)
+            assert loaded.entityId == assembly.entityId
+            assert set(loaded.graph.edges(keys=True)) == set(
+                assembly.graph.edges(keys=True)
+            )
+            for entityId, entity in assembly.get_entities().items():
+                restored = loaded.get_entity(entityId)
+                assert type(restored) is type(entity)
+                assert restored["name"] == entity["name"]
+                assert restored.try_get_attribute("gfa") == entity.try_get_attribute(
+                    "gfa"
+                )
+                assert restored.try_get_attribute(
+                    "subtotal_gfa"
+                ) == entity.try_get_attribute("subtotal_gfa")
+
+            leaf = loaded.get_entity("root.1.1")
+            assert leaf["params"] == {"use": "residential", "floor": 3}
+            assert leaf["tenant"] is None
+            assert not hasattr(loaded.get_entity("root"), "tenant")
+            pd.testing.assert_series_equal(
+                leaf["income"].movements,
+                assembly.get_entity("root.1.1")["income"].movements,
+            )
+
+            stream = loaded.get_entity("root")["subtotal_income"]
+            assert isinstance(stream, rk.flux.Stream)
+            assert len(stream.flows) == 2
+            assert np.isclose(stream.sum().movements.sum(), 6 * 12)
+
+            building = loaded.get_entity("building")
+            assert isinstance(building, rk.graph.Assembly)
+            assert building.graph.number_of_edges() == 2
+
+        # Flows share their date indices:
+        loaded = rk.snapshot.load(tmp_path)
+        flows = [
+            loaded.get_entity(leaf)["income"]
+            for leaf in ["root.0.0", "root.0.1", "root.1.0", "root.1.1"]
+        ]
+        assert all(flow.movements.index is flows[0].movements.index for flow in flows)
+
+    def test_fresh_process(self, tmp_path):
+        registry = rk.measure.Index.registry
+        if "USD" not in registry:
+            rk.measure.register_currency(registry=registry, code="USD")
+        assembly = _tree(depth=1, breadth=2)
+        leaf = assembly.get_entity("root.0")
+        leaf["floors"] = 3
+        leaf["rent"] = rk.flux.Flow.from_sequence(
+            sequence=rk.duration.Sequence.from_bounds(
+                include_start=pd.Timestamp(2020, 1, 1),
+                bound=pd.Timestamp(2020, 12, 31),
+                frequency=rk.duration.Type.MONTH,
+            ),
+            data=[100.0] * 12,
+            name="Rent",
+            units=registry.Unit("USD"),
+        )
+        rk.snapshot.save(assembly, tmp_path)
+
+        # Int properties and currency units round-trip in a process that has not
+        # registered the currency:
+        code = (
+            "import sys; import rangekeeper as rk; "
+            "leaf = rk.snapshot.load(sys.argv[1]).get_entity('root.0'); "
+            "print(repr(leaf['floors']), leaf['rent'].units, leaf['rent'].movements.sum())"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code, str(tmp_path)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.split() == ["3", "USD", "1200.0"]